@@ -0,0 +1,119 @@
+"""消息回调接收吞吐量对比: TCP 短连接 / HTTP 长连接 / HTTP 管线化
+
+用法: python benchmarks/bench_ingest.py [--messages 20000] [--clients 8] [--workers 32] [--idle 0]
+--idle 指定在 HTTP 测试期间额外保持的空闲长连接数
+"""
+import time
+import socket
+import argparse
+import threading
+import socketserver
+
+from wxhelper.core import RequestHandler
+from wxhelper.server import HTTPRequestHandler, PooledHTTPServer
+
+PAYLOAD = b'{"msgId": 1, "type": 1, "fromUser": "wxid_a", "toUser": "wxid_b", "content": "hello"}'
+
+
+class CountingBot:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.count = 0
+
+    def ingest(self, raw_data: bytes) -> None:
+        with self.lock:
+            self.count += 1
+
+
+def serve(server) -> tuple:
+    server.bot = CountingBot()
+    threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True).start()
+    return server.server_address
+
+
+def tcp_client(address: tuple, count: int) -> None:
+    for _ in range(count):
+        with socket.create_connection(address) as sock:
+            sock.sendall(PAYLOAD + b"\n")
+            sock.recv(1024)
+
+
+def http_request() -> bytes:
+    return (
+        b"POST / HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+        b"Content-Length: " + str(len(PAYLOAD)).encode() + b"\r\n\r\n" + PAYLOAD
+    )
+
+
+def read_responses(file, count: int) -> None:
+    for _ in range(count):
+        length = 0
+        while True:
+            line = file.readline()
+            if line in (b"\r\n", b""):
+                break
+            if line.lower().startswith(b"content-length:"):
+                length = int(line.split(b":")[1])
+        file.read(length)
+
+
+def http_client(address: tuple, count: int, pipeline: int = 1) -> None:
+    request = http_request()
+    with socket.create_connection(address) as sock:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        file = sock.makefile("rb")
+        sent = 0
+        while sent < count:
+            batch = min(pipeline, count - sent)
+            sock.sendall(request * batch)
+            read_responses(file, batch)
+            sent += batch
+
+
+def measure(name: str, server, client, messages: int, clients: int, **kwargs) -> None:
+    address = serve(server)
+    per_client = messages // clients
+    threads = [
+        threading.Thread(target=client, args=(address, per_client), kwargs=kwargs)
+        for _ in range(clients)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    received = server.bot.count
+    server.shutdown()
+    server.server_close()
+    print(f"{name:<16} {received:>8} msgs {elapsed:8.2f}s {received / elapsed:10.0f} msg/s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=32)
+    parser.add_argument("--pipeline", type=int, default=16)
+    parser.add_argument("--idle", type=int, default=0)
+    args = parser.parse_args()
+
+    socketserver.ThreadingTCPServer.daemon_threads = True
+    measure(
+        "tcp", socketserver.ThreadingTCPServer(("127.0.0.1", 0), RequestHandler),
+        tcp_client, args.messages, args.clients
+    )
+
+    for name, pipeline in (("http keep-alive", 1), ("http pipelined", args.pipeline)):
+        server = PooledHTTPServer(("127.0.0.1", 0), HTTPRequestHandler, args.workers)
+        idle = [socket.create_connection(server.server_address) for _ in range(args.idle)]
+        for sock in idle:
+            sock.sendall(http_request())
+        measure(name, server, http_client, args.messages, args.clients, pipeline=pipeline)
+        for sock in idle:
+            sock.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""消息路由基准: 大量关键词/前缀/正则/群/发送者规则下的编译耗时及单条消息匹配耗时
+
+用法: python benchmarks/bench_router.py [--rules 10000] [--messages 2000]
+匹配结果与逐条规则暴力匹配的结果逐条核对
+"""
+import re
+import time
+import random
+import argparse
+
+from wxhelper.model import Event
+from wxhelper.router import Router, Rule
+
+WORDS = ["天气", "红包", "签到", "help", "order", "status", "价格", "report", "ping", "抽奖"]
+
+
+def noop(bot, event) -> None:
+    pass
+
+
+def make_rule(rng: random.Random, index: int, rooms: list, senders: list) -> Rule:
+    kind = index % 5
+    word = f"{rng.choice(WORDS)}{index}"
+    if kind == 0:
+        return Rule(noop, keywords=[word, rng.choice(WORDS)] if index % 50 == 0 else [word])
+    if kind == 1:
+        return Rule(noop, prefixes=[f"/{word}"])
+    if kind == 2:
+        # 含字面量前缀与不含字面量前缀的正则各半
+        pattern = f"{word}\\s*(\\d+)" if index % 10 == 2 else f"\\d+{re.escape(word)}"
+        return Rule(noop, regex=[pattern], rooms=[rng.choice(rooms)] if index % 20 == 2 else None)
+    if kind == 3:
+        return Rule(noop, rooms=[rng.choice(rooms)], keywords=[word] if index % 15 == 3 else None)
+    return Rule(noop, senders=[rng.choice(senders)], prefixes=[f"!{word}"] if index % 20 == 4 else None)
+
+
+def make_event(rng: random.Random, rules: int, rooms: list, senders: list) -> Event:
+    word = f"{rng.choice(WORDS)}{rng.randrange(rules)}"
+    content = rng.choice([
+        f"hello {word} world",
+        f"/{word} now",
+        f"!{word}",
+        f"{word} 42",
+        f"7{word}",
+        "nothing to see here " * 5
+    ])
+    return Event(content=content, fromGroup=rng.choice(rooms), fromUser=rng.choice(senders), type=1)
+
+
+def brute_force(rules: list, event: Event) -> list:
+    text = event.content if isinstance(event.content, str) else ""
+    matched = []
+    for rule in rules:
+        checks = []
+        if rule.keywords:
+            checks.append(any(keyword in text for keyword in rule.keywords))
+        if rule.prefixes:
+            checks.append(any(text.startswith(prefix) for prefix in rule.prefixes))
+        if rule.regex:
+            checks.append(any(re.search(pattern, text) for pattern in rule.regex))
+        if rule.rooms:
+            checks.append(event.fromGroup in rule.rooms)
+        if rule.senders:
+            checks.append(event.fromUser in rule.senders)
+        if all(checks):
+            matched.append(rule)
+    return matched
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rules", type=int, default=10000)
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--check", type=int, default=200, help="与暴力匹配核对的消息数")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    rooms = [f"{index}@chatroom" for index in range(200)]
+    senders = [f"wxid_{index}" for index in range(1000)]
+    rules = [make_rule(rng, index, rooms, senders) for index in range(args.rules)]
+    events = [make_event(rng, args.rules, rooms, senders) for _ in range(args.messages)]
+
+    router = Router()
+    for rule in rules:
+        router.add(rule)
+
+    start = time.perf_counter()
+    router.compile()
+    compile_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    hits = 0
+    for event in events:
+        hits += len(router.match(event))
+    match_time = (time.perf_counter() - start) / len(events)
+
+    wrong = 0
+    for event in events[:args.check]:
+        if router.match(event) != brute_force(rules, event):
+            wrong += 1
+
+    print(f"rules         {args.rules}")
+    print(f"compile       {compile_time * 1e3:.1f} ms")
+    print(f"match         {match_time * 1e6:.1f} us/message, {hits / len(events):.2f} rules/message")
+    print(f"checked       {min(args.check, len(events))} messages, mismatched {wrong}")
+
+
+if __name__ == "__main__":
+    main()
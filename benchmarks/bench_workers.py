@@ -0,0 +1,94 @@
+"""CPU密集型消息处理: 线程池与进程池(handle(process=True))吞吐量对比
+
+用法: python benchmarks/bench_workers.py [--events 200] [--work 200000]
+进程池会依次以 1..CPU核数 个进程测试, 单核机器上无法体现扩展性
+"""
+import os
+import time
+import hashlib
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from wxhelper.model import Event
+from wxhelper.workers import ProcessHandlerPool
+
+
+class CountingBot:
+    """接收处理完成通知的Bot替身, 子进程通过代理调用done"""
+
+    def __init__(self, total: int):
+        self.total = total
+        self.count = 0
+        self.lock = threading.Lock()
+        self.finished = threading.Event()
+
+    def done(self, msg_id: int) -> None:
+        with self.lock:
+            self.count += 1
+            if self.count >= self.total:
+                self.finished.set()
+
+
+def cpu_task(bot, event: Event) -> None:
+    digest = event.content.encode()
+    for _ in range(event.timestamp):
+        digest = hashlib.sha1(digest).digest()
+    bot.done(event.msgId)
+
+
+def events(count: int, work: int) -> list:
+    return [Event(content=f"message {index}", msgId=index, type=1, timestamp=work) for index in range(count)]
+
+
+def run_threads(items: list, workers: int) -> float:
+    bot = CountingBot(len(items))
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for event in items:
+            executor.submit(cpu_task, bot, event)
+    bot.finished.wait()
+    return time.perf_counter() - start
+
+
+def run_processes(items: list, workers: int) -> float:
+    bot = CountingBot(len(items))
+    pool = ProcessHandlerPool(bot, max_workers=workers)
+    # 预热: 启动全部子进程并建立代理连接
+    warmup = CountingBot(workers)
+    pool.bot = warmup
+    handler = pool.wrap(cpu_task)
+    for event in events(workers, 1):
+        handler(warmup, event)
+    warmup.finished.wait()
+
+    pool.bot = bot
+    start = time.perf_counter()
+    for event in items:
+        handler(bot, event)
+    bot.finished.wait()
+    elapsed = time.perf_counter() - start
+    pool.shutdown()
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=200)
+    parser.add_argument("--work", type=int, default=200000, help="每条消息的sha1迭代次数")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    items = events(args.events, args.work)
+    baseline = run_threads(items, args.max_workers)
+    print(f"threads x{args.max_workers:<3} {baseline:8.2f}s {args.events / baseline:8.1f} events/s")
+    for workers in range(1, args.max_workers + 1):
+        elapsed = run_processes(items, workers)
+        print(
+            f"processes x{workers:<3} {elapsed:8.2f}s {args.events / elapsed:8.1f} events/s "
+            f"speedup {baseline / elapsed:5.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
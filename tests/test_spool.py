@@ -0,0 +1,60 @@
+import tempfile
+import unittest
+
+from wxhelper.spool import SpillQueue
+
+
+def drain(queue: SpillQueue) -> list:
+    items = []
+    while True:
+        item = queue.get(timeout=0)
+        if item is None:
+            return items
+        items.append(item)
+
+
+class SpillQueueRestartTest(unittest.TestCase):
+
+    def test_acked_sequence_not_reused_after_restart(self):
+        with tempfile.TemporaryDirectory() as directory:
+            # 写入10条, 确认3条后崩溃
+            queue = SpillQueue(directory)
+            seqs = [queue.put(b"first-%d" % i) for i in range(10)]
+            for seq in seqs[:3]:
+                queue.ack(seq)
+
+            # 重放剩余7条并全部确认, 正常关闭
+            queue = SpillQueue(directory)
+            items = drain(queue)
+            self.assertEqual([data for _, data in items], [b"first-%d" % i for i in range(3, 10)])
+            for seq, _ in items:
+                queue.ack(seq)
+            queue.close()
+
+            # 写入10条新消息后崩溃
+            queue = SpillQueue(directory)
+            new_seqs = [queue.put(b"second-%d" % i) for i in range(10)]
+            self.assertTrue(min(new_seqs) > max(seqs))
+
+            # 重启后新消息全部重放
+            queue = SpillQueue(directory)
+            self.assertEqual([data for _, data in drain(queue)], [b"second-%d" % i for i in range(10)])
+            queue.close()
+
+    def test_sequence_survives_empty_restarts(self):
+        with tempfile.TemporaryDirectory() as directory:
+            queue = SpillQueue(directory)
+            seq = queue.put(b"data")
+            queue.ack(seq)
+            queue.close()
+
+            for _ in range(3):
+                SpillQueue(directory).close()
+
+            queue = SpillQueue(directory)
+            self.assertGreater(queue.put(b"data"), seq)
+            queue.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
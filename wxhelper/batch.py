@@ -0,0 +1,57 @@
+import typing
+import functools
+from concurrent.futures import Future, ThreadPoolExecutor
+
+if typing.TYPE_CHECKING:
+    from .core import Bot
+
+Method = typing.Union[str, typing.Callable]
+Call = typing.Union[
+    typing.Tuple[Method, typing.Sequence],
+    typing.Tuple[Method, typing.Sequence, typing.Dict[str, typing.Any]]
+]
+
+
+class Batch:
+    """批量并发调用接口, 通过与Bot相同的方法名提交调用并返回Future
+
+    with bot.batch() as batch:
+        future = batch.get_contact_nickname(wxid)
+    """
+
+    def __init__(self, bot: "Bot", max_workers: int = 8):
+        self.bot = bot
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="wxhelper-batch")
+        self.futures: typing.List[Future] = []
+
+    def submit(self, method: Method, *args, **kwargs) -> Future:
+        func = getattr(self.bot, method) if isinstance(method, str) else method
+        future = self.executor.submit(func, *args, **kwargs)
+        self.futures.append(future)
+        return future
+
+    def __getattr__(self, name: str) -> typing.Any:
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        attr = getattr(self.bot, name)
+        if not callable(attr):
+            return attr
+        return functools.partial(self.submit, name)
+
+    def results(self) -> typing.List[typing.Any]:
+        """按提交顺序返回结果, 出错的调用返回对应的异常对象"""
+        results = []
+        for future in self.futures:
+            e = future.exception()
+            results.append(e if e is not None else future.result())
+        return results
+
+    def close(self, wait: bool = True) -> None:
+        self.executor.shutdown(wait=wait)
+
+    def __enter__(self) -> "Batch":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
@@ -0,0 +1,108 @@
+import time
+import typing
+import threading
+from collections import deque
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# 批量接口(全表查询/好友列表/数据库信息)的超时时间, 其耗时随数据量增长, 不参与自适应超时统计
+BULK_TIMEOUT = 300
+
+
+class CircuitOpenError(Exception):
+    """熔断器打开时快速失败"""
+
+
+class LatencyTracker:
+    """按接口统计最近的调用耗时, 超时时间取 p99 * factor 并限制在 [floor, ceiling] 之间"""
+
+    def __init__(
+        self,
+        factor: float = 3,
+        floor: float = 1,
+        ceiling: float = 30,
+        window: int = 200,
+        min_samples: int = 20
+    ):
+        self.factor = factor
+        self.floor = floor
+        self.ceiling = ceiling
+        self.window = window
+        self.min_samples = min_samples
+        self.samples: typing.Dict[str, typing.Deque[float]] = {}
+
+    def record(self, endpoint: str, seconds: float) -> None:
+        samples = self.samples.get(endpoint)
+        if samples is None:
+            samples = self.samples.setdefault(endpoint, deque(maxlen=self.window))
+        samples.append(seconds)
+
+    def timeout(self, endpoint: str) -> float:
+        samples = self.samples.get(endpoint)
+        if not samples or len(samples) < self.min_samples:
+            return self.ceiling
+
+        ordered = sorted(samples)
+        p99 = ordered[int(0.99 * (len(ordered) - 1))]
+        return min(max(p99 * self.factor, self.floor), self.ceiling)
+
+
+class CircuitBreaker:
+    """连续超时达到阈值后打开熔断, 冷却后通过探测请求决定是否恢复"""
+
+    def __init__(
+        self,
+        threshold: int = 5,
+        cooldown: float = 10,
+        on_change: typing.Optional[typing.Callable[[str, str, int], typing.Any]] = None
+    ):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.on_change = on_change
+        self.lock = threading.Lock()
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+
+    def transition(self, state: str) -> None:
+        with self.lock:
+            previous, self.state = self.state, state
+            if state == OPEN:
+                self.opened_at = time.monotonic()
+            elif state == CLOSED:
+                self.failures = 0
+            failures = self.failures
+
+        if previous != state and callable(self.on_change):
+            self.on_change(state, previous, failures)
+
+    def before_call(self, probe: typing.Callable[[], bool]) -> None:
+        with self.lock:
+            if self.state == CLOSED:
+                return
+            if self.state == HALF_OPEN or time.monotonic() - self.opened_at < self.cooldown:
+                raise CircuitOpenError(f"circuit breaker is {self.state}")
+            self.state = HALF_OPEN
+
+        if callable(self.on_change):
+            self.on_change(HALF_OPEN, OPEN, self.failures)
+
+        if probe():
+            self.transition(CLOSED)
+        else:
+            self.transition(OPEN)
+            raise CircuitOpenError("circuit breaker probe failed")
+
+    def record_success(self) -> None:
+        if self.failures:
+            with self.lock:
+                self.failures = 0
+
+    def record_failure(self) -> None:
+        with self.lock:
+            self.failures += 1
+            trip = self.state == CLOSED and self.failures >= self.threshold
+        if trip:
+            self.transition(OPEN)
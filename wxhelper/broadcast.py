@@ -0,0 +1,169 @@
+import os
+import json
+import time
+import typing
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from .logger import logger
+from .model import Response
+
+if typing.TYPE_CHECKING:
+    from .core import Bot
+
+Payload = typing.Union[str, typing.Callable[["Bot", str], Response]]
+
+
+class Broadcast:
+    """群发任务, 支持并发、限速、断点续发及进度统计
+
+    超时的目标可能已经发送成功, 记为"unknown", 续发时不会自动重发
+    """
+
+    def __init__(
+        self,
+        bot: "Bot",
+        targets: typing.List[str],
+        payload: Payload,
+        checkpoint: typing.Optional[str] = None,
+        max_workers: int = 4,
+        interval: float = 0.5,
+        report_every: int = 100
+    ):
+        self.bot = bot
+        self.targets = list(dict.fromkeys(targets))
+        self.payload = payload
+        self.checkpoint = checkpoint
+        self.max_workers = max_workers
+        self.interval = interval
+        self.report_every = report_every
+        self.lock = threading.Lock()
+        self.next_time = 0.0
+        self.status: typing.Dict[str, str] = self.load()
+        self.sent = 0
+        self.failed = 0
+        self.unknown = 0
+        self.started_at: typing.Optional[float] = None
+        self.thread: typing.Optional[threading.Thread] = None
+        self.file: typing.Optional[typing.TextIO] = None
+        self.stopped = threading.Event()
+
+    def load(self) -> typing.Dict[str, str]:
+        status = {}
+        if self.checkpoint is None or not os.path.exists(self.checkpoint):
+            return status
+
+        with open(self.checkpoint, "r", encoding="utf-8") as file:
+            for line in file:
+                try:
+                    item = json.loads(line)
+                except ValueError:
+                    continue
+                status[item["target"]] = item["status"]
+        return status
+
+    def record(self, target: str, status: str, error: typing.Optional[str] = None) -> None:
+        with self.lock:
+            self.status[target] = status
+            if status == "sent":
+                self.sent += 1
+            elif status == "unknown":
+                self.unknown += 1
+            else:
+                self.failed += 1
+
+            if self.file is not None:
+                self.file.write(json.dumps({
+                    "target": target,
+                    "status": status,
+                    "error": error,
+                    "time": int(time.time())
+                }, ensure_ascii=False) + "\n")
+                self.file.flush()
+
+            done = self.sent + self.failed + self.unknown
+        if self.report_every and done % self.report_every == 0:
+            logger.info(f"broadcast progress: {self.progress()}")
+
+    def wait_turn(self) -> None:
+        with self.lock:
+            now = time.monotonic()
+            wait = self.next_time - now
+            self.next_time = max(now, self.next_time) + self.interval
+        if wait > 0:
+            self.stopped.wait(wait)
+
+    def send(self, target: str) -> None:
+        self.wait_turn()
+        if self.stopped.is_set():
+            return
+
+        try:
+            if callable(self.payload):
+                response = self.payload(self.bot, target)
+            else:
+                response = self.bot.send_text(target, self.payload)
+        except requests.ConnectTimeout as e:
+            self.record(target, "failed", repr(e))
+            return
+        except requests.Timeout as e:
+            # 请求已发出但未收到响应, 可能已经发送成功
+            self.record(target, "unknown", repr(e))
+            return
+        except Exception as e:
+            self.record(target, "failed", repr(e))
+            return
+
+        # 接口通过code表示结果, 大于0为成功
+        if isinstance(response, Response) and response.code <= 0:
+            self.record(target, "failed", f"code: {response.code}, result: {response.result}")
+        else:
+            self.record(target, "sent")
+
+    @property
+    def pending(self) -> typing.List[str]:
+        return [target for target in self.targets if self.status.get(target) not in ("sent", "unknown")]
+
+    def progress(self) -> dict:
+        with self.lock:
+            elapsed = time.monotonic() - self.started_at if self.started_at else 0
+            done = self.sent + self.failed + self.unknown
+            return {
+                "total": len(self.targets),
+                "sent": sum(1 for target in self.targets if self.status.get(target) == "sent"),
+                "failed": sum(1 for target in self.targets if self.status.get(target) == "failed"),
+                "unknown": sum(1 for target in self.targets if self.status.get(target) == "unknown"),
+                "throughput": round(done / elapsed, 2) if elapsed else 0.0
+            }
+
+    def run(self) -> dict:
+        self.started_at = time.monotonic()
+        if self.checkpoint is not None:
+            self.file = open(self.checkpoint, "a", encoding="utf-8")
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="wxhelper-broadcast") as executor:
+                for target in self.pending:
+                    executor.submit(self.send, target)
+        finally:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+        progress = self.progress()
+        logger.info(f"broadcast finished: {progress}")
+        return progress
+
+    def start(self) -> "Broadcast":
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        """停止任务, 未发送的目标保持待发送状态, 可从断点继续"""
+        self.stopped.set()
+
+    def join(self, timeout: typing.Optional[float] = None) -> dict:
+        if self.thread is not None:
+            self.thread.join(timeout)
+        return self.progress()
@@ -0,0 +1,50 @@
+import json
+import time
+import typing
+import sqlite3
+import threading
+
+
+class PersistentCache:
+    """基于sqlite的持久化缓存, 超过容量时按最近访问时间淘汰"""
+
+    def __init__(self, filename: str, maxsize: int = 10000):
+        self.maxsize = maxsize
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(filename, check_same_thread=False)
+        self.conn.execute(
+            "create table if not exists cache (key text primary key, value text not null, atime real not null)"
+        )
+        self.conn.execute("create index if not exists cache_atime on cache (atime)")
+        self.conn.commit()
+
+    def get(self, key: str) -> typing.Any:
+        with self.lock:
+            row = self.conn.execute("select value from cache where key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self.conn.execute("update cache set atime = ? where key = ?", (time.time(), key))
+            self.conn.commit()
+        return json.loads(row[0])
+
+    def set(self, key: str, value: typing.Any) -> None:
+        with self.lock:
+            self.conn.execute(
+                "insert or replace into cache (key, value, atime) values (?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), time.time())
+            )
+            count = self.conn.execute("select count(*) from cache").fetchone()[0]
+            if count > self.maxsize:
+                self.conn.execute(
+                    "delete from cache where key in (select key from cache order by atime limit ?)",
+                    (count - self.maxsize,)
+                )
+            self.conn.commit()
+
+    def __len__(self) -> int:
+        with self.lock:
+            return self.conn.execute("select count(*) from cache").fetchone()[0]
+
+    def close(self) -> None:
+        with self.lock:
+            self.conn.close()
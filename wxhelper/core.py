@@ -1,20 +1,50 @@
 import os
 import json
+import time
 import typing
+import datetime
+import threading
 import traceback
 import socketserver
-from functools import lru_cache
+from functools import lru_cache, partial
+from concurrent.futures import ThreadPoolExecutor
 
 import psutil
 import pyee
 import requests
 
-from .logger import logger
-from .events import ALL_MESSAGE
+from .logger import logger, log_event
+from .batch import Batch, Call
+from .breaker import BULK_TIMEOUT, CircuitBreaker, LatencyTracker
+from .broadcast import Broadcast, Payload
+from .cache import PersistentCache
+from .dispatch import Lane, PriorityDispatcher, default_classifier
+from .events import ALL_MESSAGE, TEXT_MESSAGE, NOTICE_MESSAGE, SYSTEM_MESSAGE, CIRCUIT_BREAKER_EVENT, \
+    LANE_SHED_EVENT
+from .flight import SingleFlight
+from .history import History
+from .media import MediaPipeline
+from .router import Router, Rule
+from .roster import Roster, RosterManager
+from .scheduler import Scheduler
+from .server import HTTPRequestHandler, PooledHTTPServer
+from .snapshot import Snapshot
+from .spool import SpillQueue
+from .workers import ProcessHandlerPool
 from .model import Event, Account, Contact, Room, RoomMembers, Table, DB, Response, UserInfo, \
     CheckLoginResponse, RoomMemberNicknameResponse, ExecSQLResponse, OCRResponse, NicknameResponse, \
-    QRCodeUrlResponse, RoomMember
-from .utils import WeChatManager, start_wechat_with_inject, fake_wechat_version, get_pid, parse_event
+    QRCodeUrlResponse, RoomMember, SNSItem, CircuitBreakerEvent, LaneShedEvent
+from .utils import WeChatManager, start_wechat_with_inject, fake_wechat_version, get_pid, parse_event, file_hash, \
+    parse_sns_page, iter_json_array, extract_event_meta, importing_spawn_main
+
+# 只读接口, 相同参数的并发调用会被合并为一次请求
+READ_ONLY_API_TYPES = {"0", "1", "19", "25", "26", "32", "46", "47", "49", "55", "60"}
+
+# 批量接口, 使用固定的 BULK_TIMEOUT
+BULK_API_TYPES = {"32", "46"}
+
+# 快照全量核对间隔(秒)
+SNAPSHOT_RECONCILE_INTERVAL = 3600
 
 
 class RequestHandler(socketserver.BaseRequestHandler):
@@ -31,7 +61,7 @@ class RequestHandler(socketserver.BaseRequestHandler):
                     break
 
             bot = getattr(self.server, "bot")
-            bot.on_event(data)
+            bot.ingest(data)
             self.request.sendall("200 OK".encode())
         except Exception:
             logger.error(traceback.format_exc())
@@ -50,6 +80,13 @@ class Bot:
         on_stop: typing.Optional[typing.Callable[["Bot"], typing.Any]] = None,
         faked_version: typing.Optional[str] = None
     ):
+        # spawn子进程(如进程池)会重新导入启动脚本, 不能在导入过程中再次注入启动微信
+        if importing_spawn_main():
+            raise RuntimeError(
+                'Bot cannot be created while a child process re-imports the main script, '
+                'create and run it under `if __name__ == "__main__":`'
+            )
+
         self.version = "3.9.2.23"
         self.server_host = "127.0.0.1"
         self.remote_host = "127.0.0.1"
@@ -69,6 +106,19 @@ class Bot:
         self.FILE_SAVE_PATH = None
         self.IMAGE_SAVE_PATH = None
         self.VIDEO_SAVE_PATH = None
+        self.media = MediaPipeline(self)
+        self.ocr_cache = None
+        self.routers: typing.Dict[str, Router] = {}
+        self.rosters = RosterManager(self)
+        self.history: typing.Optional[History] = History()
+        self.spill_queue: typing.Optional[SpillQueue] = None
+        self.process_pool: typing.Optional[ProcessHandlerPool] = None
+        self.single_flight = SingleFlight()
+        self.api_latency = LatencyTracker()
+        self.circuit_breaker = CircuitBreaker(on_change=self.on_circuit_breaker_change)
+        self.snapshot: typing.Optional[Snapshot] = None
+        self.dispatcher: typing.Optional[PriorityDispatcher] = None
+        self.scheduler = Scheduler(self)
 
         try:
             code, output = start_wechat_with_inject(self.remote_port)
@@ -90,6 +140,7 @@ class Bot:
         self.wechat_manager.add(self.process.pid, self.remote_port, self.server_port)
         self.call_hook_func(self.on_start, self)
         self.handle(ALL_MESSAGE, once=True)(self.init_bot)
+        self.handle([SYSTEM_MESSAGE, NOTICE_MESSAGE])(self.rosters.on_event)
         self.hook_sync_msg(self.server_host, self.server_port)
 
     @staticmethod
@@ -104,9 +155,45 @@ class Bot:
         self.FILE_SAVE_PATH = os.path.join(self.WXHELPER_PATH, "file")
         self.IMAGE_SAVE_PATH = os.path.join(self.WXHELPER_PATH, "image")
         self.VIDEO_SAVE_PATH = os.path.join(self.WXHELPER_PATH, "video")
+        os.makedirs(self.WXHELPER_PATH, exist_ok=True)
+        self.ocr_cache = PersistentCache(os.path.join(self.WXHELPER_PATH, "ocr.db"))
+        self.snapshot = Snapshot(os.path.join(self.WXHELPER_PATH, f"snapshot_{bot.info.wxid}.json"))
+        if self.snapshot.load() and self.snapshot.rooms:
+            self.rosters.update_contacts(self.snapshot.contacts.values())
+            self.rosters.update(self.snapshot.rooms.values())
+        threading.Thread(target=self.warm_snapshot, daemon=True).start()
+        self.scheduler.load(os.path.join(self.WXHELPER_PATH, "schedule.json"))
+        self.scheduler.schedule(
+            self.refresh_snapshot,
+            every=SNAPSHOT_RECONCILE_INTERVAL,
+            kwargs={"full": True},
+            job_id="snapshot-reconcile"
+        )
         self.call_hook_func(self.on_login, bot, event)
         logger.info(f"login success, {bot.info}")
 
+    def warm_snapshot(self) -> None:
+        """先增量刷新使快照尽快可用, 再全量核对离线期间原地修改或删除的行"""
+        self.refresh_snapshot()
+        self.refresh_snapshot(full=True)
+
+    def refresh_snapshot(self, full: bool = False) -> None:
+        """刷新联系人及群聊快照并保存, full=True时全量核对"""
+        try:
+            changed, removed = self.snapshot.refresh(self, full=full)
+            self.rosters.update_contacts(changed["Contact"])
+            if changed["ChatRoom"]:
+                self.rosters.update(changed["ChatRoom"])
+            for room_id in removed["ChatRoom"]:
+                self.rosters.discard(room_id)
+            self.snapshot.save()
+            logger.info(
+                f"snapshot refreshed, changed: {', '.join(f'{k}: {len(v)}' for k, v in changed.items())}, "
+                f"removed: {', '.join(f'{k}: {len(v)}' for k, v in removed.items())}"
+            )
+        except Exception:
+            logger.error(traceback.format_exc())
+
     def set_webhook_url(self, webhook_url: str) -> None:
         self.webhook_url = webhook_url
 
@@ -118,7 +205,93 @@ class Bot:
                 pass
 
     def call_api(self, **kwargs) -> dict:
-        return requests.request("POST", self.BASE_URL, **kwargs).json()
+        api_type = (kwargs.get("params") or {}).get("type")
+        if api_type in READ_ONLY_API_TYPES:
+            key = (api_type, json.dumps(kwargs.get("json"), sort_keys=True))
+            return self.single_flight.do(key, lambda: self.request_api(**kwargs))
+        return self.request_api(**kwargs)
+
+    def api_timeout(self, api_type: str, timeout: typing.Optional[float]) -> typing.Tuple[float, bool]:
+        """返回超时时间及是否记录耗时, 指定timeout或批量接口不参与自适应超时统计"""
+        if timeout is not None:
+            return timeout, False
+        if api_type in BULK_API_TYPES:
+            return BULK_TIMEOUT, False
+        return self.api_latency.timeout(api_type), True
+
+    def request_api(self, timeout: typing.Optional[float] = None, **kwargs) -> dict:
+        api_type = (kwargs.get("params") or {}).get("type")
+        timeout, adaptive = self.api_timeout(api_type, timeout)
+        self.circuit_breaker.before_call(self.probe_api)
+        start = time.monotonic()
+        try:
+            response = requests.request("POST", self.BASE_URL, timeout=timeout, **kwargs)
+        except (requests.Timeout, requests.ConnectionError):
+            self.circuit_breaker.record_failure()
+            raise
+
+        if adaptive:
+            self.api_latency.record(api_type, time.monotonic() - start)
+        self.circuit_breaker.record_success()
+        return response.json()
+
+    def probe_api(self) -> bool:
+        """通过检查登录状态接口探测dll是否恢复"""
+        params = {
+            "type": "0"
+        }
+        try:
+            CheckLoginResponse(**requests.request(
+                "POST",
+                self.BASE_URL,
+                params=params,
+                timeout=self.api_latency.timeout(params["type"])
+            ).json())
+        except Exception:
+            return False
+        return True
+
+    def on_circuit_breaker_change(self, state: str, previous: str, failures: int) -> None:
+        logger.warning(f"circuit breaker {previous} -> {state}, failures: {failures}")
+        self.event_emitter.emit(
+            str(CIRCUIT_BREAKER_EVENT),
+            self,
+            CircuitBreakerEvent(state=state, previous=previous, failures=failures)
+        )
+
+    def call_api_stream(
+        self,
+        chunk_size: int = 64 * 1024,
+        timeout: typing.Optional[float] = None,
+        **kwargs
+    ) -> typing.Iterator[bytes]:
+        api_type = (kwargs.get("params") or {}).get("type")
+        timeout, adaptive = self.api_timeout(api_type, timeout)
+        self.circuit_breaker.before_call(self.probe_api)
+        start = time.monotonic()
+        try:
+            with requests.request("POST", self.BASE_URL, stream=True, timeout=timeout, **kwargs) as response:
+                yield from response.iter_content(chunk_size=chunk_size)
+        except (requests.Timeout, requests.ConnectionError):
+            self.circuit_breaker.record_failure()
+            raise
+
+        if adaptive:
+            self.api_latency.record(api_type, time.monotonic() - start)
+        self.circuit_breaker.record_success()
+
+    def batch(self, max_workers: int = 8) -> Batch:
+        """批量并发调用接口"""
+        return Batch(self, max_workers=max_workers)
+
+    def call_many(self, calls: typing.List[Call], max_workers: int = 8) -> typing.List[typing.Any]:
+        """并发执行多个接口调用, 按顺序返回结果, 单个调用出错时返回异常对象而不影响其他调用"""
+        with self.batch(max_workers=max_workers) as batch:
+            for call in calls:
+                method, args = call[0], call[1]
+                kwargs = call[2] if len(call) > 2 else {}
+                batch.submit(method, *args, **kwargs)
+        return batch.results()
 
     def hook_sync_msg(
         self,
@@ -312,6 +485,14 @@ class Bot:
         }
         return [Contact(**item) for item in self.call_api(params=params)["data"]]
 
+    def iter_contacts(self) -> typing.Iterator[Contact]:
+        """逐个获取好友, 边接收边解析"""
+        params = {
+            "type": "46"
+        }
+        for item in iter_json_array(self.call_api_stream(params=params)):
+            yield Contact(**item)
+
     def get_contact_nickname(self, wxid: str) -> NicknameResponse:
         """获取联系人（好友/群）昵称"""
         params = {
@@ -431,7 +612,10 @@ class Bot:
             "wxid": wxid,
             "nickName": nickname
         }
-        return Response(**self.call_api(params=params, json=data))
+        response = Response(**self.call_api(params=params, json=data))
+        if response.code > 0:
+            self.rosters.rename(room_id, wxid, nickname)
+        return response
 
     def top_msg(self, room_id: str, wxid: str) -> Response:
         """置顶群消息"""
@@ -501,8 +685,19 @@ class Bot:
             for item in self.call_api(params=params)["data"]
         ]
 
-    def exec_sql(self, db_handle: int, sql: str) -> ExecSQLResponse:
-        """查询数据库"""
+    def iter_db_info(self) -> typing.Iterator[DB]:
+        """逐个获取数据库句柄, 边接收边解析"""
+        params = {
+            "type": "32"
+        }
+        for item in iter_json_array(self.call_api_stream(params=params)):
+            yield DB(databaseName=item["databaseName"], handle=item["handle"], tables=[
+                Table(**sub_item)
+                for sub_item in item["tables"]
+            ])
+
+    def exec_sql(self, db_handle: int, sql: str, timeout: typing.Optional[float] = None) -> ExecSQLResponse:
+        """查询数据库, 全表等耗时较长的查询可指定timeout(如BULK_TIMEOUT), 不参与自适应超时统计"""
         params = {
             "type": "34"
         }
@@ -510,7 +705,7 @@ class Bot:
             "dbHandle": db_handle,
             "sql": sql
         }
-        return ExecSQLResponse(**self.call_api(params=params, json=data))
+        return ExecSQLResponse(**self.call_api(params=params, json=data, timeout=timeout))
 
     def decode_image(self, image_path: str, save_path: str) -> Response:
         """解码图片"""
@@ -523,15 +718,35 @@ class Bot:
         }
         return Response(**self.call_api(params=params, json=data))
 
-    def ocr(self, image_path: str) -> OCRResponse:
+    def ocr(self, image_path: str, digest: typing.Optional[str] = None) -> OCRResponse:
         """识别图片文本内容"""
+        if self.ocr_cache is not None:
+            digest = digest or file_hash(image_path)
+            cached = self.ocr_cache.get(digest)
+            if cached is not None:
+                return OCRResponse(**cached)
+
         params = {
             "type": "49"
         }
         data = {
             "imagePath": os.path.abspath(image_path)
         }
-        return OCRResponse(**self.call_api(params=params, json=data))
+        response = self.call_api(params=params, json=data)
+        if self.ocr_cache is not None and response.get("text"):
+            self.ocr_cache.set(digest, response)
+        return OCRResponse(**response)
+
+    def ocr_many(self, image_paths: typing.List[str], max_workers: int = 2) -> typing.List[OCRResponse]:
+        """批量识别图片文本内容, 相同内容的图片只识别一次, 结果与输入顺序一致"""
+        digests = [file_hash(image_path) for image_path in image_paths]
+        unique = dict(zip(digests, image_paths))
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="wxhelper-ocr") as executor:
+            futures = {
+                digest: executor.submit(self.ocr, image_path, digest)
+                for digest, image_path in unique.items()
+            }
+        return [futures[digest].result() for digest in digests]
 
     def download_attachment(self, msg_id: int) -> Response:
         """下载消息附件"""
@@ -571,6 +786,39 @@ class Bot:
         }
         return Response(**self.call_api(params=params, json=data))
 
+    def iter_sns(self, watermark_file: typing.Optional[str] = None) -> typing.Iterator[SNSItem]:
+        """遍历朋友圈, 后台预取下一页; 指定watermark_file时遇到上次遍历到的最新动态即停止"""
+        watermark = 0
+        if watermark_file is not None and os.path.exists(watermark_file):
+            with open(watermark_file, "r", encoding="utf-8") as file:
+                watermark = json.load(file).get("snsId", 0)
+
+        fields = set(SNSItem.__dataclass_fields__)
+        newest = watermark
+        last_sns_id = None
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="wxhelper-sns") as executor:
+            future = executor.submit(self.call_api, params={"type": "53"})
+            while future is not None:
+                items = parse_sns_page(future.result())
+                if not items or items[-1]["snsId"] == last_sns_id:
+                    break
+
+                last_sns_id = items[-1]["snsId"]
+                future = None
+                if last_sns_id > watermark:
+                    future = executor.submit(self.call_api, params={"type": "54"}, json={"snsId": last_sns_id})
+
+                for item in items:
+                    if item["snsId"] <= watermark:
+                        future = None
+                        break
+                    newest = max(newest, item["snsId"])
+                    yield SNSItem(**{key: value for key, value in item.items() if key in fields})
+
+        if watermark_file is not None and newest > watermark:
+            with open(watermark_file, "w", encoding="utf-8") as file:
+                json.dump({"snsId": newest}, file)
+
     def confirm_receipt(self, wxid: str, transcation_id: str, transfer_id: str) -> Response:
         """确认收款"""
         params = {
@@ -613,6 +861,51 @@ class Bot:
     def info(self) -> Account:
         return self.get_self_info()
 
+    def broadcast(
+        self,
+        targets: typing.List[str],
+        payload: Payload,
+        checkpoint: typing.Optional[str] = None,
+        max_workers: int = 4,
+        interval: float = 0.5
+    ) -> Broadcast:
+        """群发消息, payload为文本或 func(bot, wxid) 发送函数, 指定checkpoint文件可断点续发, 返回的任务可调用stop()停止"""
+        return Broadcast(
+            self,
+            targets,
+            payload,
+            checkpoint=checkpoint,
+            max_workers=max_workers,
+            interval=interval
+        ).start()
+
+    def schedule(
+        self,
+        func: typing.Callable,
+        at: typing.Union[float, datetime.datetime, None] = None,
+        every: typing.Optional[float] = None,
+        delay: typing.Optional[float] = None,
+        args: tuple = (),
+        kwargs: typing.Optional[dict] = None,
+        job_id: typing.Optional[str] = None
+    ) -> str:
+        """添加定时任务, 如 bot.schedule(bot.send_text, delay=60, args=(wxid, msg)), 返回任务id"""
+        return self.scheduler.schedule(func, at=at, every=every, delay=delay, args=args, kwargs=kwargs, job_id=job_id)
+
+    def cancel_schedule(self, job_id: str) -> bool:
+        """取消定时任务"""
+        return self.scheduler.cancel(job_id)
+
+    def get_db_handle(self, database_name: str) -> int:
+        for db in self.db_info:
+            if db.databaseName == database_name:
+                return db.handle
+        return self.db_info[0].handle
+
+    def get_roster(self, room_id: str) -> Roster:
+        """获取群成员名册"""
+        return self.rosters.get(room_id)
+
     def get_contact_by_db(self, wxid: str) -> typing.Union[dict, None]:
         result = self.exec_sql(self.db_info[0].handle, "select * from Contact where UserName = '%s';" % wxid)
         fields = result.data.pop(0)
@@ -628,11 +921,64 @@ class Bot:
         for item in result.data:
             return dict(zip(fields, item))["smallHeadImgUrl"]
 
-    def on_event(self, raw_data: bytes) -> None:
+    def ingest(self, raw_data: bytes) -> None:
+        if self.spill_queue is not None:
+            self.spill_queue.put(raw_data)
+        else:
+            self.on_event(raw_data)
+
+    def consume_spill_queue(self) -> None:
+        while True:
+            item = self.spill_queue.get()
+            if item is None:
+                break
+            seq, raw_data = item
+            self.on_event(raw_data, partial(self.spill_queue.ack, seq))
+
+    def enable_priority_lanes(
+        self,
+        lanes: typing.Optional[typing.List[Lane]] = None,
+        classifier: typing.Callable[[Event], str] = default_classifier,
+        workers: int = 4
+    ) -> PriorityDispatcher:
+        """按优先级通道调度消息处理, 默认好友验证/转账 > 私聊 > 群聊, 群聊积压过多时丢弃并汇总"""
+        self.dispatcher = PriorityDispatcher(
+            self.dispatch_event,
+            lanes=lanes,
+            classifier=classifier,
+            workers=workers,
+            on_shed=self.on_lane_shed
+        )
+        return self.dispatcher
+
+    def on_lane_shed(self, lane: str, dropped: typing.Dict[int, int]) -> None:
+        logger.warning(f"lane {lane} shed {sum(dropped.values())} events: {dropped}")
+        self.event_emitter.emit(str(LANE_SHED_EVENT), self, LaneShedEvent(lane=lane, dropped=dropped))
+
+    def on_event(self, raw_data: bytes, callback: typing.Optional[typing.Callable[[], typing.Any]] = None) -> None:
         try:
             data = json.loads(raw_data)
-            event = Event(**parse_event(data))
-            logger.debug(event)
+            meta = extract_event_meta(data)
+            if meta.get("atUsers"):
+                meta["isAtMe"] = self.info.wxid in meta["atUsers"]
+            event = Event(**parse_event(data), **meta)
+            log_event(event)
+            if self.history is not None:
+                self.history.append(event, len(raw_data))
+        except Exception:
+            logger.error(traceback.format_exc())
+            logger.error(raw_data)
+            self.call_hook_func(callback)
+            return
+
+        if self.dispatcher is not None:
+            self.dispatcher.put(event, data, callback)
+        else:
+            self.dispatch_event(event, data)
+            self.call_hook_func(callback)
+
+    def dispatch_event(self, event: Event, data: dict) -> None:
+        try:
             self.call_hook_func(self.on_before_message, self, event)
             self.event_emitter.emit(str(ALL_MESSAGE), self, event)
             self.event_emitter.emit(str(event.type), self, event)
@@ -640,32 +986,105 @@ class Bot:
             self.webhook(data)
         except Exception:
             logger.error(traceback.format_exc())
-            logger.error(raw_data)
+            logger.error(event)
 
     def handle(
         self,
         events: typing.Union[typing.List[str], str, None] = None,
-        once: bool = False
-    ) -> typing.Callable[[typing.Callable], None]:
+        once: bool = False,
+        process: bool = False
+    ) -> typing.Callable[[typing.Callable], typing.Callable]:
+        """注册消息处理函数, process=True时在进程池中执行(bot参数为转发接口调用的代理)
+
+        使用process=True时, 启动脚本中Bot的创建及运行必须放在 if __name__ == "__main__": 下,
+        处理函数需定义在可被子进程导入的模块中
+        """
+
         def wrapper(func):
+            listener = func
+            if process:
+                if self.process_pool is None:
+                    self.process_pool = ProcessHandlerPool(self)
+                listener = self.process_pool.wrap(func)
+
             listen = self.event_emitter.on if not once else self.event_emitter.once
             if not events:
-                listen(str(ALL_MESSAGE), func)
+                listen(str(ALL_MESSAGE), listener)
             else:
                 for event in events if isinstance(events, list) else [events]:
-                    listen(str(event), func)
+                    listen(str(event), listener)
+            return func
+
+        return wrapper
+
+    def route(
+        self,
+        keywords: typing.Optional[typing.List[str]] = None,
+        prefixes: typing.Optional[typing.List[str]] = None,
+        regex: typing.Optional[typing.List[str]] = None,
+        rooms: typing.Optional[typing.List[str]] = None,
+        senders: typing.Optional[typing.List[str]] = None,
+        events: typing.Union[typing.List[str], str, int, None] = TEXT_MESSAGE
+    ) -> typing.Callable[[typing.Callable], typing.Callable]:
+        """按关键词/前缀/正则/群/发送者路由消息, 所有规则编译后每条消息只匹配一遍"""
+
+        def wrapper(func):
+            rule = Rule(func, keywords=keywords, prefixes=prefixes, regex=regex, rooms=rooms, senders=senders)
+            for event in events if isinstance(events, list) else [events]:
+                router = self.routers.get(str(event))
+                if router is None:
+                    router = self.routers[str(event)] = Router()
+                    self.handle(event)(router.dispatch)
+                router.add(rule)
+            return func
 
         return wrapper
 
     def exit(self) -> None:
         self.call_hook_func(self.on_stop, self)
+        self.media.shutdown(wait=False)
+        if self.spill_queue is not None:
+            self.spill_queue.close()
+        if self.process_pool is not None:
+            self.process_pool.shutdown(wait=False)
+        if self.dispatcher is not None:
+            self.dispatcher.close()
+        self.scheduler.stop()
         self.process.terminate()
 
-    def run(self) -> None:
+    def run(
+        self,
+        spill_dir: typing.Optional[str] = None,
+        spill_workers: int = 4,
+        mode: str = "tcp",
+        http_workers: int = 32
+    ) -> None:
+        """启动消息监听服务
+
+        指定spill_dir时消息先写入持久化队列再由spill_workers个线程处理;
+        mode="http"时改用http回调接收消息, 由http_workers个线程处理连接
+        """
         try:
-            server = socketserver.ThreadingTCPServer((self.server_host, self.server_port), RequestHandler)
+            if spill_dir is not None:
+                self.spill_queue = SpillQueue(spill_dir)
+                logger.info(f"Spill queue at {spill_dir}, {len(self.spill_queue)} events to replay")
+                for _ in range(spill_workers):
+                    threading.Thread(target=self.consume_spill_queue, daemon=True).start()
+
+            if mode == "http":
+                server = PooledHTTPServer((self.server_host, self.server_port), HTTPRequestHandler, http_workers)
+                self.unhook_sync_msg()
+                self.hook_sync_msg(
+                    self.server_host,
+                    self.server_port,
+                    enable_http=1,
+                    callback_url=f"http://{self.server_host}:{self.server_port}/"
+                )
+            else:
+                server = socketserver.ThreadingTCPServer((self.server_host, self.server_port), RequestHandler)
             server.bot = self
-            logger.info(f"Listening Server at {self.server_host}:{self.server_port}")
+            self.scheduler.start()
+            logger.info(f"Listening {mode.upper()} Server at {self.server_host}:{self.server_port}")
             server.serve_forever()
         except (KeyboardInterrupt, SystemExit):
             self.exit()
@@ -0,0 +1,159 @@
+import time
+import typing
+import threading
+import traceback
+from collections import Counter, deque
+
+from .logger import logger
+from .events import FRIEND_VERIFY_MESSAGE, XML_MESSAGE
+from .model import Event
+
+# 转账消息的app消息类型
+TRANSFER_APP_MSG_TYPE = 2000
+
+
+class Lane:
+    """优先级通道, weight为调度权重, 队列长度超过max_depth时丢弃新消息
+
+    policy="drop" 只计数, policy="summarize" 会在通道恢复后汇总被丢弃的消息
+    """
+
+    def __init__(self, name: str, weight: int = 1, max_depth: typing.Optional[int] = None, policy: str = "drop"):
+        self.name = name
+        self.weight = weight
+        self.max_depth = max_depth
+        self.policy = policy
+        self.queue: typing.Deque[tuple] = deque()
+        self.current_weight = 0
+        self.enqueued = 0
+        self.dispatched = 0
+        self.dropped = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self.shed: typing.Counter[int] = Counter()
+
+    def stats(self) -> dict:
+        return {
+            "depth": len(self.queue),
+            "enqueued": self.enqueued,
+            "dispatched": self.dispatched,
+            "dropped": self.dropped,
+            "latency_avg": self.latency_total / self.dispatched if self.dispatched else 0.0,
+            "latency_max": self.latency_max
+        }
+
+
+def default_lanes() -> typing.List[Lane]:
+    return [
+        Lane("urgent", weight=8),
+        Lane("direct", weight=4),
+        Lane("group", weight=1, max_depth=10000, policy="summarize")
+    ]
+
+
+def default_classifier(event: Event) -> str:
+    if event.type == FRIEND_VERIFY_MESSAGE:
+        return "urgent"
+    if event.type == XML_MESSAGE and event.appMsgType == TRANSFER_APP_MSG_TYPE:
+        return "urgent"
+    if event.fromGroup and event.fromGroup.endswith("@chatroom"):
+        return "group"
+    return "direct"
+
+
+class PriorityDispatcher:
+    """按消息类型及会话类型分通道排队, 工作线程按权重公平调度(平滑加权轮询)"""
+
+    def __init__(
+        self,
+        dispatch: typing.Callable[[Event, dict], typing.Any],
+        lanes: typing.Optional[typing.List[Lane]] = None,
+        classifier: typing.Callable[[Event], str] = default_classifier,
+        workers: int = 4,
+        on_shed: typing.Optional[typing.Callable[[str, typing.Dict[int, int]], typing.Any]] = None
+    ):
+        self.dispatch = dispatch
+        self.lanes = {lane.name: lane for lane in lanes or default_lanes()}
+        self.classifier = classifier
+        self.on_shed = on_shed
+        self.cond = threading.Condition()
+        self.closed = False
+        for _ in range(workers):
+            threading.Thread(target=self.work, daemon=True).start()
+
+    def put(self, event: Event, data: dict, callback: typing.Optional[typing.Callable[[], typing.Any]] = None) -> bool:
+        lane = self.lanes.get(self.classifier(event)) or next(iter(self.lanes.values()))
+        with self.cond:
+            if lane.max_depth is not None and len(lane.queue) >= lane.max_depth:
+                lane.dropped += 1
+                lane.shed[event.type] += 1
+                dropped = True
+            else:
+                lane.queue.append((time.monotonic(), event, data, callback))
+                lane.enqueued += 1
+                self.cond.notify()
+                dropped = False
+
+        if dropped and callable(callback):
+            callback()
+        return not dropped
+
+    def take(self) -> typing.Optional[typing.Tuple[Lane, tuple, typing.Optional[dict]]]:
+        with self.cond:
+            while True:
+                ready = [lane for lane in self.lanes.values() if lane.queue]
+                if ready:
+                    break
+                if self.closed:
+                    return None
+                self.cond.wait()
+
+            total = 0
+            chosen = ready[0]
+            for lane in ready:
+                lane.current_weight += lane.weight
+                total += lane.weight
+                if lane.current_weight > chosen.current_weight:
+                    chosen = lane
+            chosen.current_weight -= total
+
+            item = chosen.queue.popleft()
+            latency = time.monotonic() - item[0]
+            chosen.dispatched += 1
+            chosen.latency_total += latency
+            chosen.latency_max = max(chosen.latency_max, latency)
+
+            summary = None
+            if chosen.shed and chosen.policy == "summarize" and len(chosen.queue) <= chosen.max_depth // 2:
+                summary, chosen.shed = dict(chosen.shed), Counter()
+            return chosen, item, summary
+
+    def work(self) -> None:
+        while True:
+            taken = self.take()
+            if taken is None:
+                break
+
+            lane, (_, event, data, callback), summary = taken
+            if summary and callable(self.on_shed):
+                try:
+                    self.on_shed(lane.name, summary)
+                except Exception:
+                    logger.error(traceback.format_exc())
+
+            try:
+                self.dispatch(event, data)
+            except Exception:
+                logger.error(traceback.format_exc())
+            finally:
+                if callable(callback):
+                    callback()
+
+    def stats(self) -> typing.Dict[str, dict]:
+        with self.cond:
+            return {name: lane.stats() for name, lane in self.lanes.items()}
+
+    def close(self) -> None:
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
@@ -25,4 +25,8 @@ XML_MESSAGE = 49
 # 视频/语音通话消息事件
 VOIP_MESSAGE = 50
 # 手机端同步消息事件
-PHONE_MESSAGE = 51
\ No newline at end of file
+PHONE_MESSAGE = 51
+# 熔断器状态变化事件
+CIRCUIT_BREAKER_EVENT = 90000
+# 优先级队列丢弃消息汇总事件
+LANE_SHED_EVENT = 90001
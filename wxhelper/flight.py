@@ -0,0 +1,41 @@
+import copy
+import typing
+import threading
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    """合并相同的并发请求: 同一时刻相同key只执行一次, 其余调用等待并共享结果"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls: typing.Dict[typing.Hashable, typing.List] = {}
+        self.coalesced = 0
+
+    def do(self, key: typing.Hashable, func: typing.Callable[[], typing.Any]) -> typing.Any:
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.calls[key] = [Future(), 0]
+            else:
+                call[1] += 1
+                self.coalesced += 1
+
+        future = call[0]
+        if not leader:
+            return copy.deepcopy(future.result())
+
+        try:
+            result = func()
+        except BaseException as e:
+            with self.lock:
+                self.calls.pop(key, None)
+            future.set_exception(e)
+            raise
+
+        with self.lock:
+            self.calls.pop(key, None)
+        future.set_result(result)
+        # 有其他调用共享结果时返回副本, 避免调用方修改结果互相影响
+        return copy.deepcopy(result) if call[1] else result
@@ -0,0 +1,75 @@
+import typing
+import itertools
+import threading
+from collections import OrderedDict, deque
+
+from .model import Event
+
+
+class History:
+    """按会话保存最近消息的环形缓冲区, 单会话及全局均有上限, 超出全局上限时淘汰最久未活跃的会话"""
+
+    def __init__(self, max_per_chat: int = 50, max_events: int = 100000):
+        self.max_per_chat = max_per_chat
+        self.max_events = max_events
+        self.lock = threading.Lock()
+        self.chats: typing.OrderedDict[str, deque] = OrderedDict()
+        self.events = 0
+        self.bytes = 0
+
+    @staticmethod
+    def chat_id(event: Event) -> typing.Optional[str]:
+        return event.fromGroup or event.fromUser
+
+    def append(self, event: Event, size: int = 0) -> None:
+        chat_id = self.chat_id(event)
+        if chat_id is None:
+            return
+
+        with self.lock:
+            buffer = self.chats.get(chat_id)
+            if buffer is None:
+                buffer = self.chats[chat_id] = deque(maxlen=self.max_per_chat)
+            else:
+                self.chats.move_to_end(chat_id)
+
+            if len(buffer) == buffer.maxlen:
+                self.events -= 1
+                self.bytes -= buffer[0][1]
+            buffer.append((event, size))
+            self.events += 1
+            self.bytes += size
+
+            while self.events > self.max_events and len(self.chats) > 1:
+                _, evicted = self.chats.popitem(last=False)
+                self.events -= len(evicted)
+                self.bytes -= sum(item[1] for item in evicted)
+
+    def recent(self, chat_id: str, n: typing.Optional[int] = None) -> typing.List[Event]:
+        """获取会话最近n条消息, 按时间顺序排列"""
+        with self.lock:
+            buffer = self.chats.get(chat_id)
+            if not buffer:
+                return []
+            n = len(buffer) if n is None else min(n, len(buffer))
+            items = list(itertools.islice(reversed(buffer), n))
+        return [event for event, _ in reversed(items)]
+
+    def clear(self, chat_id: typing.Optional[str] = None) -> None:
+        with self.lock:
+            if chat_id is None:
+                self.chats.clear()
+                self.events = 0
+                self.bytes = 0
+            else:
+                evicted = self.chats.pop(chat_id, None) or ()
+                self.events -= len(evicted)
+                self.bytes -= sum(item[1] for item in evicted)
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "chats": len(self.chats),
+                "events": self.events,
+                "bytes": self.bytes
+            }
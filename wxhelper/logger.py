@@ -1,11 +1,45 @@
 import os
 import sys
+import random
+import typing
 
 from loguru import logger
 
+
+def parse_event_mapping(value: str, cast: typing.Callable[[str], typing.Any]) -> typing.Dict[int, typing.Any]:
+    # 格式: "1:INFO,10002:TRACE" 或 "1:0.1,10002:0.01"
+    mapping = {}
+    for item in value.split(","):
+        if ":" in item:
+            key, _, val = item.partition(":")
+            mapping[int(key.strip())] = cast(val.strip())
+    return mapping
+
+
+LOG_LEVEL = os.environ.get("WXHELPER_LOG_LEVEL", "DEBUG")
+LOG_EVENT_LEVELS = parse_event_mapping(os.environ.get("WXHELPER_LOG_EVENT_LEVELS", ""), str.upper)
+LOG_EVENT_SAMPLES = parse_event_mapping(os.environ.get("WXHELPER_LOG_EVENT_SAMPLES", ""), float)
+
 logger.remove()
 logger.add(
     sink=sys.stdout,
     format=os.environ.get("WXHELPER_LOG_FORMAT", "<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level}</level> | <level>{message}</level>"),
-    level=os.environ.get("WXHELPER_LOG_LEVEL", "DEBUG")
+    level=LOG_LEVEL,
+    enqueue=os.environ.get("WXHELPER_LOG_ENQUEUE", "0") == "1"
 )
+
+LOG_LEVEL_NO = logger.level(LOG_LEVEL).no
+LOG_EVENT_LEVEL_NOS = {key: logger.level(level).no for key, level in LOG_EVENT_LEVELS.items()}
+DEBUG_NO = logger.level("DEBUG").no
+
+
+def log_event(event: typing.Any) -> None:
+    """记录消息事件, 低于日志级别或未被采样时不做任何格式化"""
+    if LOG_EVENT_LEVEL_NOS.get(event.type, DEBUG_NO) < LOG_LEVEL_NO:
+        return
+
+    rate = LOG_EVENT_SAMPLES.get(event.type)
+    if rate is not None and random.random() >= rate:
+        return
+
+    logger.opt(lazy=True).log(LOG_EVENT_LEVELS.get(event.type, "DEBUG"), "{}", lambda: event)
@@ -0,0 +1,109 @@
+import os
+import glob
+import typing
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from .model import Event
+from .utils import file_hash, wait_for_file
+
+if typing.TYPE_CHECKING:
+    from .core import Bot
+
+
+class MediaPipeline:
+    """媒体处理流水线: 下载附件 -> 等待文件落盘 -> 解码, 作为一个任务在有界线程池中执行"""
+
+    def __init__(self, bot: "Bot", max_workers: int = 4, timeout: float = 60, max_decoded: int = 1024):
+        self.bot = bot
+        self.timeout = timeout
+        self.max_decoded = max_decoded
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="wxhelper-media")
+        self.lock = threading.Lock()
+        self.pending: typing.Dict[typing.Tuple[str, int], Future] = {}
+        # (源文件哈希, 保存目录) -> 解码后的文件路径, 按最近使用淘汰
+        self.decoded: typing.OrderedDict[typing.Tuple[str, str], str] = OrderedDict()
+
+    def submit(self, kind: str, msg_id: int, func: typing.Callable[[], str]) -> Future:
+        key = (kind, msg_id)
+        with self.lock:
+            future = self.pending.get(key)
+            if future is not None:
+                return future
+
+            future = self.executor.submit(func)
+            self.pending[key] = future
+
+        def done(_):
+            with self.lock:
+                self.pending.pop(key, None)
+
+        future.add_done_callback(done)
+        return future
+
+    def resolve_path(self, path: str) -> str:
+        if os.path.isabs(path) or self.bot.DATA_SAVE_PATH is None:
+            return path
+        return os.path.join(self.bot.DATA_SAVE_PATH, path)
+
+    def download(self, event: Event, path: str) -> str:
+        path = self.resolve_path(path)
+        if not os.path.exists(path):
+            self.bot.download_attachment(event.msgId)
+        return wait_for_file(path, self.timeout)
+
+    def decode(self, image_path: str, save_path: str) -> str:
+        key = (file_hash(image_path), os.path.abspath(save_path))
+        with self.lock:
+            output = self.decoded.get(key)
+            if output is not None:
+                self.decoded.move_to_end(key)
+        if output is not None and os.path.exists(output):
+            return output
+
+        os.makedirs(save_path, exist_ok=True)
+        self.bot.decode_image(image_path, save_path)
+        stem = os.path.splitext(os.path.basename(image_path))[0]
+        outputs = glob.glob(os.path.join(glob.escape(save_path), glob.escape(stem) + ".*"))
+        if not outputs:
+            raise FileNotFoundError(f"decoded image not found: {image_path}")
+
+        output = wait_for_file(outputs[0], self.timeout)
+        with self.lock:
+            self.decoded[key] = output
+            self.decoded.move_to_end(key)
+            while len(self.decoded) > self.max_decoded:
+                self.decoded.popitem(last=False)
+        return output
+
+    def fetch_image(self, event: Event, save_path: typing.Optional[str] = None) -> Future:
+        """下载并解码图片消息, Future结果为解码后的图片路径"""
+
+        def job():
+            image_path = self.download(event, event.path or event.thumbPath)
+            return self.decode(image_path, save_path or self.bot.IMAGE_SAVE_PATH)
+
+        return self.submit("image", event.msgId, job)
+
+    def fetch_video(self, event: Event) -> Future:
+        """下载视频消息, Future结果为视频文件路径"""
+
+        def job():
+            return self.download(event, event.path)
+
+        return self.submit("video", event.msgId, job)
+
+    def fetch_voice(self, event: Event, voice_dir: typing.Optional[str] = None) -> Future:
+        """获取语音消息, Future结果为语音文件路径"""
+
+        def job():
+            save_path = voice_dir or os.path.join(self.bot.WXHELPER_PATH, "voice")
+            os.makedirs(save_path, exist_ok=True)
+            self.bot.get_voice(event.msgId, save_path)
+            return wait_for_file(os.path.join(save_path, f"{event.msgId}.amr"), self.timeout)
+
+        return self.submit("voice", event.msgId, job)
+
+    def shutdown(self, wait: bool = True) -> None:
+        self.executor.shutdown(wait=wait)
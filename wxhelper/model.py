@@ -21,6 +21,10 @@ class Event:
     timestamp: typing.Optional[int] = None
     type: typing.Optional[int] = None
     data: typing.Optional[list] = None
+    atUsers: typing.FrozenSet[str] = frozenset()
+    isAtMe: bool = False
+    quoteMsgId: typing.Optional[int] = None
+    appMsgType: typing.Optional[int] = None
 
 
 @dataclass
@@ -152,3 +156,29 @@ class RoomMember:
     nickname: str
     v3: str
     wxid: str
+
+
+@dataclass
+class SNSItem:
+    """朋友圈动态"""
+    snsId: int
+    senderId: typing.Optional[str] = None
+    nickName: typing.Optional[str] = None
+    createTime: typing.Optional[int] = None
+    content: typing.Optional[str] = None
+    xml: typing.Optional[typing.Any] = None
+
+
+@dataclass
+class CircuitBreakerEvent:
+    """熔断器状态变化事件"""
+    state: str
+    previous: str
+    failures: int
+
+
+@dataclass
+class LaneShedEvent:
+    """优先级队列丢弃消息汇总事件"""
+    lane: str
+    dropped: typing.Dict[int, int]
@@ -0,0 +1,200 @@
+import re
+import typing
+import threading
+
+from .breaker import BULK_TIMEOUT
+from .events import NOTICE_MESSAGE, SYSTEM_MESSAGE
+from .model import Event
+
+if typing.TYPE_CHECKING:
+    from .core import Bot
+
+SEPARATOR = "^G"
+KICKOUT_PATTERN = re.compile(r'你将"(.+?)"移出了群聊')
+# 自己被移出或退出群聊
+SELF_REMOVED_PATTERN = re.compile(r'你被"(.+?)"移出群聊|你已退出(该)?群聊|You were removed from the group chat|You left the group chat')
+# 系统消息模板中被加入/移出的成员所在的链接名, 其余链接(如操作者username)不变
+JOIN_LINKS = ("names", "adder", "others")
+KICKOUT_LINKS = ("names", "kickoutname")
+
+
+class Roster:
+    """群成员名册, O(1) 判断成员及查询群昵称
+
+    nicknames为群内昵称(ChatRoom.DisplayNameList), 未设置时使用所有群共享的联系人昵称contact_names
+    """
+
+    def __init__(
+        self,
+        room_id: str,
+        members: typing.Optional[typing.Dict[str, str]] = None,
+        contact_names: typing.Optional[typing.Dict[str, str]] = None
+    ):
+        self.room_id = room_id
+        self.nicknames: typing.Dict[str, str] = dict(members or {})
+        self.members: typing.Set[str] = set(self.nicknames)
+        self.contact_names = contact_names if contact_names is not None else {}
+
+    def __contains__(self, wxid: str) -> bool:
+        return wxid in self.members
+
+    def __len__(self) -> int:
+        return len(self.members)
+
+    def __iter__(self) -> typing.Iterator[str]:
+        return iter(self.members)
+
+    def nickname(self, wxid: str) -> typing.Optional[str]:
+        if wxid not in self.members:
+            return None
+        return self.nicknames.get(wxid) or self.contact_names.get(wxid) or ""
+
+    def add(self, wxid: str, nickname: str = "") -> None:
+        self.members.add(wxid)
+        self.nicknames[wxid] = nickname
+
+    def remove(self, wxid: str) -> None:
+        self.members.discard(wxid)
+        self.nicknames.pop(wxid, None)
+
+    def rename(self, wxid: str, nickname: str) -> None:
+        if wxid in self.members:
+            self.nicknames[wxid] = nickname
+
+    def find(self, nickname: str) -> typing.Optional[str]:
+        for wxid in self.members:
+            if self.nickname(wxid) == nickname:
+                return wxid
+
+
+def parse_room_row(user_name_list: typing.Optional[str], display_name_list: typing.Optional[str]) -> typing.Dict[str, str]:
+    wxids = user_name_list.split(SEPARATOR) if user_name_list else []
+    nicknames = display_name_list.split(SEPARATOR) if display_name_list else []
+    nicknames += [""] * (len(wxids) - len(nicknames))
+    return {wxid: nickname for wxid, nickname in zip(wxids, nicknames) if wxid}
+
+
+def as_list(value: typing.Any) -> list:
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+class RosterManager:
+    """全部群的成员名册, 通过一次数据库查询批量加载, 之后由进群/退群系统消息增量更新"""
+
+    def __init__(self, bot: "Bot"):
+        self.bot = bot
+        self.lock = threading.Lock()
+        self.rosters: typing.Dict[str, Roster] = {}
+        self.contact_names: typing.Dict[str, str] = {}
+        self.loaded = False
+
+    def query(self, sql: str, timeout: typing.Optional[float] = None) -> typing.List[dict]:
+        result = self.bot.exec_sql(self.bot.get_db_handle("MicroMsg.db"), sql, timeout=timeout)
+        if not result.data:
+            return []
+        fields = result.data[0]
+        return [dict(zip(fields, row)) for row in result.data[1:]]
+
+    def load(self) -> None:
+        self.update_contacts(self.query("select UserName, NickName from Contact;", BULK_TIMEOUT))
+        self.update(self.query("select ChatRoomName, UserNameList, DisplayNameList from ChatRoom;", BULK_TIMEOUT))
+
+    def load_room(self, room_id: str) -> typing.Optional[Roster]:
+        """按需加载单个群的名册, 用于启动后新加入的群"""
+        rows = self.query(
+            "select ChatRoomName, UserNameList, DisplayNameList from ChatRoom where ChatRoomName = '%s';"
+            % room_id.replace("'", "''")
+        )
+        self.update(rows)
+        with self.lock:
+            return self.rosters.get(room_id)
+
+    def update_contacts(self, rows: typing.Iterable[dict]) -> None:
+        """用Contact表的行更新联系人昵称"""
+        self.contact_names.update((row["UserName"], row["NickName"]) for row in rows if row.get("NickName"))
+
+    def update(self, rows: typing.Iterable[dict]) -> None:
+        """用ChatRoom表的行更新名册"""
+        rosters = {
+            row["ChatRoomName"]: Roster(
+                row["ChatRoomName"],
+                parse_room_row(row["UserNameList"], row["DisplayNameList"]),
+                self.contact_names
+            )
+            for row in rows
+        }
+        with self.lock:
+            self.rosters.update(rosters)
+            self.loaded = True
+
+    def get(self, room_id: str) -> Roster:
+        if not self.loaded:
+            self.load()
+        with self.lock:
+            roster = self.rosters.get(room_id)
+        if roster is None:
+            roster = self.load_room(room_id)
+        return roster if roster is not None else Roster(room_id, contact_names=self.contact_names)
+
+    def discard(self, room_id: str) -> None:
+        with self.lock:
+            self.rosters.pop(room_id, None)
+
+    def rename(self, room_id: str, wxid: str, nickname: str) -> None:
+        with self.lock:
+            roster = self.rosters.get(room_id)
+        if roster is not None:
+            roster.rename(wxid, nickname)
+
+    def on_event(self, bot: "Bot", event: Event) -> None:
+        if not self.loaded or not event.fromGroup or not event.fromGroup.endswith("@chatroom"):
+            return
+
+        if event.type == NOTICE_MESSAGE and isinstance(event.content, str):
+            if SELF_REMOVED_PATTERN.search(event.content):
+                self.discard(event.fromGroup)
+                return
+
+        with self.lock:
+            roster = self.rosters.get(event.fromGroup)
+        if roster is None:
+            # 启动后新加入的群, 直接加载数据库中的最新名册
+            self.load_room(event.fromGroup)
+            return
+
+        if event.type == NOTICE_MESSAGE and isinstance(event.content, str):
+            for nickname in KICKOUT_PATTERN.findall(event.content):
+                wxid = roster.find(nickname)
+                if wxid is not None:
+                    roster.remove(wxid)
+            return
+
+        if event.type != SYSTEM_MESSAGE or not isinstance(event.content, dict):
+            return
+
+        sysmsg = event.content.get("sysmsg") or {}
+        if sysmsg.get("@type") != "sysmsgtemplate":
+            return
+
+        template = (sysmsg.get("sysmsgtemplate") or {}).get("content_template") or {}
+        text = template.get("template") or ""
+        kickout = "移出" in text or "removed" in text
+        if not kickout and ("邀请你" in text or "invited you" in text):
+            roster.add(bot.info.wxid)
+
+        for link in as_list((template.get("link_list") or {}).get("link")):
+            name = link.get("@name")
+            for member in as_list((link.get("memberlist") or {}).get("member")):
+                wxid = member.get("username")
+                if not wxid:
+                    continue
+                if kickout and name in KICKOUT_LINKS:
+                    roster.remove(wxid)
+                elif not kickout and name in JOIN_LINKS:
+                    # 系统消息中的是联系人昵称, 新成员尚无群内昵称
+                    if member.get("nickname"):
+                        self.contact_names.setdefault(wxid, member["nickname"])
+                    if wxid not in roster:
+                        roster.add(wxid)
@@ -0,0 +1,216 @@
+import re
+import typing
+import threading
+from collections import deque
+
+from .model import Event
+
+if typing.TYPE_CHECKING:
+    from .core import Bot
+
+
+class AhoCorasick:
+    """多关键词匹配自动机, 单次扫描返回命中的关键词"""
+
+    def __init__(self, keywords: typing.Iterable[str]):
+        self.goto: typing.List[typing.Dict[str, int]] = [{}]
+        self.fail: typing.List[int] = [0]
+        self.output: typing.List[typing.Set[str]] = [set()]
+        for keyword in keywords:
+            self.add(keyword)
+        self.build()
+
+    def add(self, keyword: str) -> None:
+        state = 0
+        for char in keyword:
+            next_state = self.goto[state].get(char)
+            if next_state is None:
+                next_state = len(self.goto)
+                self.goto[state][char] = next_state
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append(set())
+            state = next_state
+        self.output[state].add(keyword)
+
+    def build(self) -> None:
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fail = self.fail[state]
+                while fail and char not in self.goto[fail]:
+                    fail = self.fail[fail]
+                self.fail[next_state] = self.goto[fail].get(char, 0)
+                self.output[next_state] |= self.output[self.fail[next_state]]
+
+    def search(self, text: str) -> typing.Set[str]:
+        found = set()
+        state = 0
+        goto, fail, output = self.goto, self.fail, self.output
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found |= output[state]
+        return found
+
+
+# 含内联标志、命名分组、反向引用或条件分组的正则不能合并为一个分支表达式
+UNCOMBINABLE_PATTERN = re.compile(r"\(\?[aiLmsux\-P(]|\\[1-9]")
+
+
+def combinable(pattern: str) -> bool:
+    return UNCOMBINABLE_PATTERN.search(pattern) is None
+
+
+def literal_prefix(pattern: str) -> str:
+    """提取正则表达式开头必然出现的字面量, 用于关键词自动机预筛选"""
+    if "|" in pattern:
+        return ""
+
+    literal = ""
+    for char in pattern:
+        if char in ".^$*+?{}[]\\|()":
+            if char in "*?{" and literal:
+                literal = literal[:-1]
+            break
+        literal += char
+    return literal
+
+
+class Rule:
+    """路由规则, 同一类条件之间为或, 不同类条件之间为且"""
+
+    def __init__(
+        self,
+        func: typing.Callable[["Bot", Event], typing.Any],
+        keywords: typing.Optional[typing.List[str]] = None,
+        prefixes: typing.Optional[typing.List[str]] = None,
+        regex: typing.Optional[typing.List[str]] = None,
+        rooms: typing.Optional[typing.List[str]] = None,
+        senders: typing.Optional[typing.List[str]] = None
+    ):
+        self.func = func
+        self.keywords = keywords or []
+        self.prefixes = prefixes or []
+        self.regex = regex or []
+        self.patterns = [re.compile(pattern) for pattern in dict.fromkeys(self.regex)]
+        self.rooms = rooms or []
+        self.senders = senders or []
+        self.conditions = sum(1 for item in (keywords, prefixes, regex, rooms, senders) if item)
+
+
+class RouteIndex:
+    """编译后的路由索引, 编译完成后只读, 可在多个线程间共享"""
+
+    def __init__(self, rules: typing.List[Rule]):
+        self.rules = rules
+        self.unconditional: typing.List[int] = []
+        self.keyword_index: typing.Dict[str, typing.List[int]] = {}
+        self.prefix_trie: typing.Dict[str, typing.Any] = {}
+        self.regex_rules: typing.List[typing.Tuple[int, typing.Pattern]] = []
+        self.regex_isolated: typing.List[typing.Tuple[int, typing.Pattern]] = []
+        self.regex_literals: typing.Dict[str, typing.List[typing.Tuple[int, typing.Pattern]]] = {}
+        self.room_index: typing.Dict[str, typing.List[int]] = {}
+        self.sender_index: typing.Dict[str, typing.List[int]] = {}
+        for index, rule in enumerate(rules):
+            if not rule.conditions:
+                self.unconditional.append(index)
+            for keyword in set(rule.keywords):
+                self.keyword_index.setdefault(keyword, []).append(index)
+            for prefix in rule.prefixes:
+                node = self.prefix_trie
+                for char in prefix:
+                    node = node.setdefault(char, {})
+                node.setdefault(None, []).append(index)
+            for pattern in rule.patterns:
+                literal = literal_prefix(pattern.pattern)
+                if len(literal) >= 2:
+                    self.regex_literals.setdefault(literal, []).append((index, pattern))
+                elif combinable(pattern.pattern):
+                    self.regex_rules.append((index, pattern))
+                else:
+                    self.regex_isolated.append((index, pattern))
+            for room in set(rule.rooms):
+                self.room_index.setdefault(room, []).append(index)
+            for sender in set(rule.senders):
+                self.sender_index.setdefault(sender, []).append(index)
+
+        literals = set(self.keyword_index) | set(self.regex_literals)
+        self.automaton = AhoCorasick(literals) if literals else None
+        self.regex_filter = re.compile(
+            "|".join(f"(?:{pattern.pattern})" for _, pattern in self.regex_rules)
+        ) if self.regex_rules else None
+
+    def match(self, event: Event) -> typing.List[Rule]:
+        rules = self.rules
+        hits: typing.Dict[int, int] = {}
+
+        def hit(indexes: typing.Iterable[int]) -> None:
+            for index in indexes:
+                hits[index] = hits.get(index, 0) + 1
+
+        text = event.content if isinstance(event.content, str) else ""
+        if text:
+            node = self.prefix_trie
+            matched = set()
+            for char in text:
+                node = node.get(char)
+                if node is None:
+                    break
+                matched.update(node.get(None, ()))
+            hit(matched)
+
+            found = self.automaton.search(text) if self.automaton is not None else set()
+            hit({index for keyword in found for index in self.keyword_index.get(keyword, ())})
+            regex_hits = {
+                index
+                for literal in found
+                for index, pattern in self.regex_literals.get(literal, ())
+                if pattern.search(text)
+            }
+
+            if self.regex_filter is not None and self.regex_filter.search(text):
+                regex_hits.update(index for index, pattern in self.regex_rules if pattern.search(text))
+            regex_hits.update(index for index, pattern in self.regex_isolated if pattern.search(text))
+            hit(regex_hits)
+
+        hit(self.room_index.get(event.fromGroup, ()))
+        hit(self.sender_index.get(event.fromUser, ()))
+        indexes = sorted(self.unconditional + [
+            index for index, count in hits.items() if count == rules[index].conditions
+        ])
+        return [rules[index] for index in indexes]
+
+
+class Router:
+    """编译后的消息路由, 每条消息只扫描一遍即可匹配全部规则"""
+
+    def __init__(self):
+        self.rules: typing.List[Rule] = []
+        self.lock = threading.Lock()
+        self.index: typing.Optional[RouteIndex] = None
+
+    def add(self, rule: Rule) -> None:
+        with self.lock:
+            self.rules.append(rule)
+            self.index = None
+
+    def compile(self) -> RouteIndex:
+        with self.lock:
+            if self.index is None:
+                self.index = RouteIndex(list(self.rules))
+            return self.index
+
+    def match(self, event: Event) -> typing.List[Rule]:
+        index = self.index
+        if index is None:
+            index = self.compile()
+        return index.match(event)
+
+    def dispatch(self, bot: "Bot", event: Event) -> None:
+        for rule in self.match(event):
+            rule.func(bot, event)
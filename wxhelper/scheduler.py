@@ -0,0 +1,292 @@
+import os
+import json
+import math
+import time
+import uuid
+import types
+import typing
+import datetime
+import importlib
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from .logger import logger
+
+if typing.TYPE_CHECKING:
+    from .core import Bot
+
+# 各层时间轮的位数: 第一层256格, 其余每层64格, 覆盖 2^26 个tick
+WHEEL_BITS = (8, 6, 6, 6)
+WHEEL_SHIFTS = (0, 8, 14, 20)
+MAX_DELTA = (1 << sum(WHEEL_BITS)) - 1
+
+
+class Job:
+    """定时任务"""
+    __slots__ = ("id", "func", "args", "kwargs", "due", "every", "tick", "level", "slot")
+
+    def __init__(
+        self,
+        id: str,
+        func: typing.Callable,
+        args: tuple,
+        kwargs: dict,
+        due: float,
+        every: typing.Optional[float]
+    ):
+        self.id = id
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.due = due
+        self.every = every
+        self.tick = 0
+        self.level = 0
+        self.slot = 0
+
+
+class TimingWheel:
+    """分层时间轮, 插入和删除均为O(1), 高层时间轮到期时逐层下放"""
+
+    def __init__(self):
+        self.current = 0
+        self.wheels: typing.List[typing.List[typing.Dict[str, Job]]] = [
+            [{} for _ in range(1 << bits)] for bits in WHEEL_BITS
+        ]
+
+    def add(self, job: Job) -> None:
+        job.tick = max(job.tick, self.current)
+        delta = job.tick - self.current
+        tick = min(job.tick, self.current + MAX_DELTA)
+        level = 0
+        while level < len(WHEEL_BITS) - 1 and delta >= 1 << (WHEEL_SHIFTS[level + 1]):
+            level += 1
+        job.level = level
+        job.slot = (tick >> WHEEL_SHIFTS[level]) & ((1 << WHEEL_BITS[level]) - 1)
+        self.wheels[level][job.slot][job.id] = job
+
+    def remove(self, job: Job) -> None:
+        self.wheels[job.level][job.slot].pop(job.id, None)
+
+    def cascade(self, level: int) -> int:
+        index = (self.current >> WHEEL_SHIFTS[level]) & ((1 << WHEEL_BITS[level]) - 1)
+        jobs, self.wheels[level][index] = self.wheels[level][index], {}
+        for job in jobs.values():
+            self.add(job)
+        return index
+
+    def advance(self) -> typing.List[Job]:
+        """前进一个tick, 返回到期的任务"""
+        index = self.current & ((1 << WHEEL_BITS[0]) - 1)
+        if index == 0:
+            for level in range(1, len(WHEEL_BITS)):
+                if self.cascade(level) != 0:
+                    break
+
+        jobs, self.wheels[0][index] = self.wheels[0][index], {}
+        due = []
+        for job in jobs.values():
+            if job.tick <= self.current:
+                due.append(job)
+            else:
+                self.add(job)
+        self.current += 1
+        return due
+
+
+class Scheduler:
+    """基于时间轮的定时任务调度, 到期任务在线程池中执行, 可持久化的任务在重启后恢复"""
+
+    def __init__(self, bot: "Bot", resolution: float = 0.1, max_workers: int = 4, save_interval: float = 60):
+        self.bot = bot
+        self.resolution = resolution
+        self.save_interval = save_interval
+        self.filename: typing.Optional[str] = None
+        self.lock = threading.Lock()
+        self.wheel = TimingWheel()
+        self.jobs: typing.Dict[str, Job] = {}
+        self.origin = time.time()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="wxhelper-scheduler")
+        self.stopped = threading.Event()
+        self.thread: typing.Optional[threading.Thread] = None
+        self.dirty = False
+
+    def to_tick(self, due: float) -> int:
+        return math.ceil((due - self.origin) / self.resolution)
+
+    def schedule(
+        self,
+        func: typing.Callable,
+        at: typing.Union[float, datetime.datetime, None] = None,
+        every: typing.Optional[float] = None,
+        delay: typing.Optional[float] = None,
+        args: tuple = (),
+        kwargs: typing.Optional[dict] = None,
+        job_id: typing.Optional[str] = None
+    ) -> str:
+        """添加定时任务, at为时间戳或datetime, delay为延迟秒数, every为重复间隔秒数, 返回任务id"""
+        if isinstance(at, datetime.datetime):
+            at = at.timestamp()
+        if at is None:
+            at = time.time() + (delay if delay is not None else every or 0)
+
+        job = Job(job_id or uuid.uuid4().hex, func, tuple(args), dict(kwargs or {}), at, every)
+        with self.lock:
+            old = self.jobs.pop(job.id, None)
+            if old is not None:
+                self.wheel.remove(old)
+            job.tick = self.to_tick(job.due)
+            self.wheel.add(job)
+            self.jobs[job.id] = job
+            self.dirty = True
+        return job.id
+
+    def cancel(self, job_id: str) -> bool:
+        with self.lock:
+            job = self.jobs.pop(job_id, None)
+            if job is None:
+                return False
+            self.wheel.remove(job)
+            self.dirty = True
+            return True
+
+    def __len__(self) -> int:
+        return len(self.jobs)
+
+    def tick(self) -> None:
+        target = int((time.time() - self.origin) / self.resolution)
+        with self.lock:
+            due = []
+            while self.wheel.current <= target:
+                due.extend(self.wheel.advance())
+
+            for job in due:
+                if job.every:
+                    job.due = max(job.due + job.every, time.time())
+                    job.tick = self.to_tick(job.due)
+                    self.wheel.add(job)
+                else:
+                    self.jobs.pop(job.id, None)
+            if due:
+                self.dirty = True
+
+        for job in due:
+            self.executor.submit(self.run_job, job)
+
+    @staticmethod
+    def run_job(job: Job) -> None:
+        try:
+            job.func(*job.args, **job.kwargs)
+        except Exception:
+            logger.error(traceback.format_exc())
+
+    def run(self) -> None:
+        last_save = time.monotonic()
+        while not self.stopped.wait(self.resolution):
+            self.tick()
+            if self.dirty and time.monotonic() - last_save >= self.save_interval:
+                self.save()
+                last_save = time.monotonic()
+
+    def start(self) -> None:
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.run, daemon=True)
+            self.thread.start()
+
+    def stop(self) -> None:
+        self.stopped.set()
+        self.save()
+        self.executor.shutdown(wait=False)
+
+    def func_ref(self, func: typing.Callable) -> typing.Optional[str]:
+        """任务函数的可持久化引用, 其他对象的绑定方法及partial等无法按名称恢复的返回None"""
+        owner = getattr(func, "__self__", None)
+        if owner is self.bot:
+            return f"bot:{func.__name__}"
+        if owner is not None and not isinstance(owner, types.ModuleType):
+            return None
+
+        module = getattr(func, "__module__", None)
+        qualname = getattr(func, "__qualname__", None)
+        if not module or not qualname or "<" in qualname:
+            return None
+        return f"{module}:{qualname}"
+
+    def resolve(self, ref: str) -> typing.Callable:
+        module, _, qualname = ref.partition(":")
+        if module == "bot":
+            return getattr(self.bot, qualname)
+
+        obj = importlib.import_module(module)
+        for name in qualname.split("."):
+            obj = getattr(obj, name)
+        return obj
+
+    def save(self) -> None:
+        if self.filename is None:
+            return
+
+        with self.lock:
+            jobs = list(self.jobs.values())
+            self.dirty = False
+
+        items = []
+        for job in jobs:
+            ref = self.func_ref(job.func)
+            if ref is None:
+                logger.warning(f"scheduled job {job.id} not saved, function {job.func!r} is not persistable")
+                continue
+            try:
+                items.append(json.dumps({
+                    "id": job.id,
+                    "func": ref,
+                    "args": list(job.args),
+                    "kwargs": job.kwargs,
+                    "due": job.due,
+                    "every": job.every
+                }, ensure_ascii=False))
+            except (TypeError, ValueError):
+                logger.warning(f"scheduled job {job.id} not saved, arguments are not JSON serializable")
+
+        tmp_filename = self.filename + ".tmp"
+        try:
+            with open(tmp_filename, "w", encoding="utf-8") as file:
+                file.write("[" + ",\n".join(items) + "]")
+            os.replace(tmp_filename, self.filename)
+        except OSError:
+            logger.error(traceback.format_exc())
+            self.dirty = True
+            if os.path.exists(tmp_filename):
+                os.remove(tmp_filename)
+
+    def load(self, filename: str) -> int:
+        """设置持久化文件并恢复其中的任务, 返回恢复的任务数"""
+        self.filename = filename
+        if not os.path.exists(filename):
+            return 0
+
+        try:
+            with open(filename, "r", encoding="utf-8") as file:
+                items = json.load(file)
+        except (OSError, ValueError):
+            logger.error(f"scheduled jobs not loaded, {filename} is corrupt: {traceback.format_exc()}")
+            return 0
+
+        count = 0
+        for item in items if isinstance(items, list) else []:
+            try:
+                func = self.resolve(item["func"])
+                self.schedule(
+                    func,
+                    at=item["due"],
+                    every=item["every"],
+                    args=tuple(item["args"]),
+                    kwargs=item["kwargs"],
+                    job_id=item["id"]
+                )
+            except Exception:
+                logger.warning(f"scheduled job skipped, cannot restore {item!r}")
+                continue
+            count += 1
+        return count
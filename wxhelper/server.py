@@ -0,0 +1,98 @@
+import time
+import select
+import threading
+import traceback
+import http.server
+from concurrent.futures import ThreadPoolExecutor
+
+from .logger import logger
+
+
+class HTTPRequestHandler(http.server.BaseHTTPRequestHandler):
+    """http消息回调处理, HTTP/1.1 长连接, 同一连接上的请求依次处理(支持管线化)
+
+    空闲连接超过idle_timeout秒或线程池已满有连接在排队时关闭, 避免空闲长连接占满线程池
+    """
+    protocol_version = "HTTP/1.1"
+    timeout = 60
+    idle_timeout = 5
+    poll_interval = 0.05
+    disable_nagle_algorithm = True
+    wbufsize = 64 * 1024
+
+    def handle(self):
+        self.close_connection = True
+        self.handle_one_request()
+        while not self.close_connection and self.wait_request():
+            self.handle_one_request()
+
+    def buffered(self) -> bool:
+        """读缓冲区中是否已有管线化的请求"""
+        self.connection.settimeout(0)
+        try:
+            return bool(self.rfile.peek(1))
+        except OSError:
+            return False
+        finally:
+            self.connection.settimeout(self.timeout)
+
+    def wait_request(self) -> bool:
+        """等待同一连接上的下一个请求, 空闲超时或有其他连接在排队时返回False"""
+        if self.buffered():
+            return True
+
+        deadline = time.monotonic() + self.idle_timeout
+        while time.monotonic() < deadline:
+            readable, _, _ = select.select([self.connection], [], [], self.poll_interval)
+            if readable:
+                return True
+            if getattr(self.server, "pending", 0) > 0:
+                return False
+        return False
+
+    def do_POST(self):
+        data = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        try:
+            bot = getattr(self.server, "bot")
+            bot.ingest(data)
+        except Exception:
+            logger.error(traceback.format_exc())
+
+        body = b"200 OK"
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class PooledHTTPServer(http.server.HTTPServer):
+    """使用有界线程池处理连接的http服务, pending为等待线程的连接数"""
+
+    def __init__(self, server_address, handler_class, max_workers: int = 32):
+        super().__init__(server_address, handler_class)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="wxhelper-http")
+        self.lock = threading.Lock()
+        self.pending = 0
+
+    def process_request(self, request, client_address):
+        with self.lock:
+            self.pending += 1
+        self.executor.submit(self.process_request_thread, request, client_address)
+
+    def process_request_thread(self, request, client_address):
+        with self.lock:
+            self.pending -= 1
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.executor.shutdown(wait=False)
@@ -0,0 +1,106 @@
+import os
+import json
+import typing
+import threading
+import traceback
+
+from .logger import logger
+from .breaker import BULK_TIMEOUT
+
+if typing.TYPE_CHECKING:
+    from .core import Bot
+
+# 表名: (主键, 增量查询sql)
+TABLES = {
+    "Contact": (
+        "UserName",
+        "select rowid, UserName, Alias, Remark, NickName, Type, VerifyFlag from Contact where rowid > %d;"
+    ),
+    "ChatRoom": (
+        "ChatRoomName",
+        "select rowid, ChatRoomName, UserNameList, DisplayNameList from ChatRoom where rowid > %d;"
+    )
+}
+
+
+class Snapshot:
+    """联系人及群聊的本地快照, 登录时直接加载, 之后只拉取rowid大于上次记录的新增/替换行
+
+    原地UPDATE且rowid不变的行及已删除的行不会被增量刷新捕获, 由 refresh(bot, full=True) 全量核对。
+    """
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        self.lock = threading.Lock()
+        self.tables: typing.Dict[str, typing.Dict[str, dict]] = {table: {} for table in TABLES}
+        self.rowids: typing.Dict[str, int] = {table: 0 for table in TABLES}
+
+    def load(self) -> bool:
+        if not os.path.exists(self.filename):
+            return False
+
+        try:
+            with open(self.filename, "r", encoding="utf-8") as file:
+                data = json.load(file)
+            tables, rowids = data["tables"], data["rowids"]
+        except (OSError, ValueError, KeyError, TypeError):
+            logger.error(f"snapshot not loaded, {self.filename} is corrupt: {traceback.format_exc()}")
+            return False
+
+        with self.lock:
+            self.tables.update(tables)
+            self.rowids.update(rowids)
+        return True
+
+    def save(self) -> None:
+        with self.lock:
+            data = json.dumps({"tables": self.tables, "rowids": self.rowids}, ensure_ascii=False)
+        tmp_filename = self.filename + ".tmp"
+        with open(tmp_filename, "w", encoding="utf-8") as file:
+            file.write(data)
+        os.replace(tmp_filename, self.filename)
+
+    def refresh(
+        self,
+        bot: "Bot",
+        full: bool = False
+    ) -> typing.Tuple[typing.Dict[str, typing.List[dict]], typing.Dict[str, typing.List[str]]]:
+        """增量刷新, full=True时全量核对, 返回各表新增或变化的行及已删除的主键"""
+        handle = bot.get_db_handle("MicroMsg.db")
+        changed = {}
+        removed = {}
+        for table, (key, sql) in TABLES.items():
+            result = bot.exec_sql(handle, sql % (0 if full else self.rowids[table]), timeout=BULK_TIMEOUT)
+            rows = []
+            removed[table] = []
+            if result.data:
+                fields = result.data[0]
+                rows = [dict(zip(fields[1:], row[1:])) for row in result.data[1:]]
+                rowid = max(int(row[0]) for row in result.data[1:]) if len(result.data) > 1 else 0
+                with self.lock:
+                    old = self.tables[table]
+                    if full:
+                        # 全量核对时丢弃已删除的行, 只返回内容有变化的行
+                        self.tables[table] = {row[key]: row for row in rows}
+                        rows = [row for row in rows if old.get(row[key]) != row]
+                        removed[table] = [name for name in old if name not in self.tables[table]]
+                    else:
+                        for row in rows:
+                            old[row[key]] = row
+                    self.rowids[table] = max(self.rowids[table], rowid)
+            changed[table] = rows
+        return changed, removed
+
+    @property
+    def contacts(self) -> typing.Dict[str, dict]:
+        return self.tables["Contact"]
+
+    @property
+    def rooms(self) -> typing.Dict[str, dict]:
+        return self.tables["ChatRoom"]
+
+    def name(self, wxid: str) -> typing.Optional[str]:
+        """联系人备注或昵称"""
+        contact = self.contacts.get(wxid)
+        if contact is not None:
+            return contact.get("Remark") or contact.get("NickName")
@@ -0,0 +1,202 @@
+import os
+import bisect
+import struct
+import typing
+import threading
+from collections import deque
+
+HEADER = struct.Struct(">QI")
+ACK = struct.Struct(">Q")
+
+
+class SpillQueue:
+    """持久化消息队列: 追加写入分段日志, 内存中保存队首, 超出内存阈值的消息只保存在磁盘;
+    处理完成后确认(ack), 重启时重放未确认的消息"""
+
+    def __init__(
+        self,
+        directory: str,
+        memory_limit: int = 64 * 1024 * 1024,
+        segment_size: int = 10000,
+        fsync: bool = False
+    ):
+        self.directory = directory
+        self.memory_limit = memory_limit
+        self.segment_size = segment_size
+        self.fsync = fsync
+        self.cond = threading.Condition()
+        self.memory: typing.Deque[typing.Tuple[int, bytes]] = deque()
+        self.memory_bytes = 0
+        self.disk: typing.Deque[typing.Tuple[int, str, int, int]] = deque()
+        self.segments: typing.List[int] = []
+        self.unacked: typing.Dict[int, int] = {}
+        self.acks = 0
+        self.next_seq = 0
+        self.closed = False
+        self.active: typing.Optional[typing.BinaryIO] = None
+        self.active_id = 0
+        self.active_count = 0
+        os.makedirs(directory, exist_ok=True)
+        self.ack_path = os.path.join(directory, "acks.log")
+        self.recover()
+        self.ack_file = open(self.ack_path, "ab")
+        self.roll()
+
+    def segment_path(self, segment_id: int) -> str:
+        return os.path.join(self.directory, "segment-%020d.log" % segment_id)
+
+    def read_acks(self) -> typing.Set[int]:
+        if not os.path.exists(self.ack_path):
+            return set()
+        with open(self.ack_path, "rb") as file:
+            data = file.read()
+        size = len(data) - len(data) % ACK.size
+        return {item[0] for item in ACK.iter_unpack(data[:size])}
+
+    def write_acks(self, acked: typing.Iterable[int]) -> None:
+        tmp_path = self.ack_path + ".tmp"
+        with open(tmp_path, "wb") as file:
+            for seq in acked:
+                file.write(ACK.pack(seq))
+        os.replace(tmp_path, self.ack_path)
+
+    def recover(self) -> None:
+        acked = self.read_acks()
+        names = sorted(name for name in os.listdir(self.directory) if name.startswith("segment-"))
+        for name in names:
+            segment_id = int(name[len("segment-"):-len(".log")])
+            # 段文件以创建时的下一个序号命名, 空段也能恢复序号
+            self.next_seq = max(self.next_seq, segment_id)
+            path = self.segment_path(segment_id)
+            pending = 0
+            with open(path, "rb") as file:
+                while True:
+                    header = file.read(HEADER.size)
+                    if len(header) < HEADER.size:
+                        break
+                    seq, length = HEADER.unpack(header)
+                    offset = file.tell()
+                    data = file.read(length)
+                    if len(data) < length:
+                        break
+                    self.next_seq = max(self.next_seq, seq + 1)
+                    if seq in acked:
+                        continue
+                    pending += 1
+                    self.enqueue(seq, data, path, offset)
+
+            if pending:
+                self.segments.append(segment_id)
+                self.unacked[segment_id] = pending
+            else:
+                os.remove(path)
+
+        # 序号不能回退, 否则新消息会与旧的确认记录冲突而在重启后丢失
+        if acked:
+            self.next_seq = max(self.next_seq, max(acked) + 1)
+        start = self.segments[0] if self.segments else self.next_seq
+        self.write_acks(sorted(seq for seq in acked if seq >= start))
+        self.acks = sum(1 for seq in acked if seq >= start)
+
+    def enqueue(self, seq: int, data: bytes, path: str, offset: int) -> None:
+        if not self.disk and self.memory_bytes + len(data) <= self.memory_limit:
+            self.memory.append((seq, data))
+            self.memory_bytes += len(data)
+        else:
+            self.disk.append((seq, path, offset, len(data)))
+
+    def roll(self) -> None:
+        if self.active is not None:
+            self.active.close()
+            if not self.unacked.get(self.active_id):
+                self.remove_segment(self.active_id)
+
+        self.active_id = self.next_seq
+        self.active_count = 0
+        self.active = open(self.segment_path(self.active_id), "ab")
+        self.segments.append(self.active_id)
+        self.unacked[self.active_id] = 0
+
+    def remove_segment(self, segment_id: int) -> None:
+        self.segments.remove(segment_id)
+        self.unacked.pop(segment_id, None)
+        try:
+            os.remove(self.segment_path(segment_id))
+        except OSError:
+            pass
+
+    def put(self, data: bytes) -> int:
+        with self.cond:
+            if self.active_count >= self.segment_size:
+                self.roll()
+
+            seq = self.next_seq
+            self.next_seq += 1
+            self.active.write(HEADER.pack(seq, len(data)))
+            offset = self.active.tell()
+            self.active.write(data)
+            self.active.flush()
+            if self.fsync:
+                os.fsync(self.active.fileno())
+
+            self.active_count += 1
+            self.unacked[self.active_id] += 1
+            self.enqueue(seq, data, self.segment_path(self.active_id), offset)
+            self.cond.notify()
+        return seq
+
+    def get(self, timeout: typing.Optional[float] = None) -> typing.Optional[typing.Tuple[int, bytes]]:
+        """取出一条消息, 队列关闭或超时返回None"""
+        with self.cond:
+            if not self.cond.wait_for(lambda: self.memory or self.disk or self.closed, timeout):
+                return None
+
+            if self.memory:
+                seq, data = self.memory.popleft()
+                self.memory_bytes -= len(data)
+                return seq, data
+
+            if self.disk:
+                seq, path, offset, length = self.disk.popleft()
+                with open(path, "rb") as file:
+                    file.seek(offset)
+                    return seq, file.read(length)
+
+    def ack(self, seq: int) -> None:
+        """确认消息已处理完成"""
+        with self.cond:
+            if self.closed:
+                return
+
+            self.ack_file.write(ACK.pack(seq))
+            self.ack_file.flush()
+            self.acks += 1
+            index = bisect.bisect_right(self.segments, seq) - 1
+            if index < 0:
+                return
+
+            segment_id = self.segments[index]
+            self.unacked[segment_id] -= 1
+            if self.unacked[segment_id] == 0 and segment_id != self.active_id:
+                self.remove_segment(segment_id)
+                if self.acks > 10 * self.segment_size:
+                    self.compact()
+
+    def compact(self) -> None:
+        self.ack_file.close()
+        start = self.segments[0]
+        acked = sorted(seq for seq in self.read_acks() if seq >= start)
+        self.write_acks(acked)
+        self.acks = len(acked)
+        self.ack_file = open(self.ack_path, "ab")
+
+    def __len__(self) -> int:
+        with self.cond:
+            return len(self.memory) + len(self.disk)
+
+    def close(self) -> None:
+        with self.cond:
+            self.closed = True
+            self.active.close()
+            self.ack_file.close()
+            self.cond.notify_all()
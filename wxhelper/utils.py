@@ -1,8 +1,14 @@
 import os
+import re
+import sys
 import json
+import time
+import codecs
 import typing
+import hashlib
 import pathlib
 import subprocess
+import multiprocessing.spawn
 
 import psutil
 import xmltodict
@@ -13,6 +19,10 @@ DLL = TOOLS / "wxhelper.dll"
 START_WECHAT = TOOLS / "start-wechat.exe"
 FAKER = TOOLS / "faker.exe"
 
+AT_USER_LIST_PATTERN = re.compile(r"<atuserlist>\s*(?:<!\[CDATA\[)?(.*?)(?:\]\]>)?\s*</atuserlist>", re.S)
+APP_MSG_TYPE_PATTERN = re.compile(r"<appmsg\b.*?<type>\s*(\d+)\s*</type>", re.S)
+REFER_MSG_ID_PATTERN = re.compile(r"<refermsg>.*?<svrid>\s*(\d+)\s*</svrid>", re.S)
+
 
 def start_wechat_with_inject(port: int) -> typing.Tuple[int, str]:
     result = subprocess.run(f"{START_WECHAT} {DLL} {port}", capture_output=True, text=True)
@@ -52,6 +62,124 @@ def parse_event(event: dict, fields=None) -> dict:
     return event
 
 
+def extract_event_meta(event: dict) -> dict:
+    """从原始xml中提取@列表、引用消息id及app消息类型, 不做完整的xml解析"""
+    meta = {}
+    signature = event.get("signature")
+    if isinstance(signature, str) and "<atuserlist>" in signature:
+        match = AT_USER_LIST_PATTERN.search(signature)
+        if match is not None:
+            meta["atUsers"] = frozenset(wxid.strip() for wxid in match.group(1).split(",") if wxid.strip())
+
+    content = event.get("content")
+    if isinstance(content, str) and "<appmsg" in content:
+        match = APP_MSG_TYPE_PATTERN.search(content)
+        if match is not None:
+            meta["appMsgType"] = int(match.group(1))
+        match = REFER_MSG_ID_PATTERN.search(content)
+        if match is not None:
+            meta["quoteMsgId"] = int(match.group(1))
+    return meta
+
+
+def importing_spawn_main() -> bool:
+    """是否正处于spawn子进程重新导入启动脚本(__mp_main__)的过程中"""
+    frame = sys._getframe(1)
+    while frame is not None:
+        code = frame.f_code
+        if code.co_filename == multiprocessing.spawn.__file__ and \
+                code.co_name in ("_fixup_main_from_path", "_fixup_main_from_name"):
+            return True
+        frame = frame.f_back
+    return False
+
+
+NUMBER_CHARS = set("0123456789+-.eE")
+
+
+def iter_json_array(chunks: typing.Iterable[bytes], key: str = "data") -> typing.Iterator[typing.Any]:
+    """增量解析响应体中key对应的json数组, 每解析出一个元素即返回, 无需等待完整响应"""
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder("utf-8")()
+    pattern = re.compile(r'"%s"\s*:' % re.escape(key))
+    chunks = iter(chunks)
+    buffer = ""
+    exhausted = False
+
+    def read() -> bool:
+        nonlocal buffer, exhausted
+        if exhausted:
+            return False
+        chunk = next(chunks, None)
+        exhausted = chunk is None
+        buffer += text_decoder.decode(chunk or b"", final=exhausted)
+        return not exhausted
+
+    def skip_space(position: int) -> typing.Optional[int]:
+        """跳过空白, 缓冲区不足时继续读取, 响应结束返回None"""
+        while True:
+            while position < len(buffer) and buffer[position] in " \t\r\n":
+                position += 1
+            if position < len(buffer):
+                return position
+            if not read():
+                return None
+
+    while True:
+        match = pattern.search(buffer)
+        if match is not None:
+            break
+        if not read():
+            raise ValueError(f"key {key!r} not found in response")
+
+    position = skip_space(match.end())
+    if position is None or buffer[position] != "[":
+        raise ValueError(f"value of key {key!r} is not a json array")
+    buffer, position = buffer[position + 1:], 0
+
+    while True:
+        position = skip_space(position)
+        if position is None:
+            raise ValueError("unexpected end of json array")
+        if buffer[position] == "]":
+            return
+
+        try:
+            item, end = decoder.raw_decode(buffer, position)
+        except ValueError:
+            if not read():
+                raise
+            continue
+
+        # 元素之后必须是分隔符, 否则可能是在缓冲区末尾被截断的数字, 读取更多数据后重新解析
+        size = len(buffer)
+        delimiter = skip_space(end)
+        if delimiter is None:
+            raise ValueError("unexpected end of json array")
+        if buffer[delimiter] not in ",]":
+            if all(char in NUMBER_CHARS for char in buffer[end:size]) and (len(buffer) > size or read()):
+                continue
+            raise ValueError(f"unexpected {buffer[delimiter]!r} in json array")
+
+        yield item
+        if buffer[delimiter] == "]":
+            return
+        buffer, position = buffer[delimiter + 1:], 0
+
+
+def parse_sns_page(response: dict) -> typing.List[dict]:
+    items = []
+    for item in response.get("data") or []:
+        item = dict(item)
+        item["snsId"] = int(item["snsId"])
+        try:
+            item["xml"] = parse_xml(item.get("content") or "")
+        except Exception:
+            item["xml"] = None
+        items.append(item)
+    return items
+
+
 class WeChatManager:
 
     def __init__(self):
@@ -117,3 +245,37 @@ class WeChatManager:
             "server_port": server_port
         })
         self.write(data)
+
+
+def file_hash(path: str, chunk_size: int = 1024 * 1024) -> str:
+    sha1 = hashlib.sha1()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            sha1.update(chunk)
+    return sha1.hexdigest()
+
+
+def wait_for_file(
+    path: str,
+    timeout: float = 60,
+    interval: float = 0.05,
+    max_interval: float = 1
+) -> str:
+    """等待文件写入完成(指数退避轮询, 文件大小连续两次不变视为完成)"""
+    deadline = time.monotonic() + timeout
+    last_size = -1
+    while True:
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            size = -1
+
+        if size > 0 and size == last_size:
+            return path
+
+        last_size = size
+        if time.monotonic() >= deadline:
+            raise TimeoutError(f"wait for file timeout: {path}")
+
+        time.sleep(interval)
+        interval = min(interval * 2, max_interval)
@@ -0,0 +1,129 @@
+import os
+import typing
+import threading
+import traceback
+import dataclasses
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing.connection import Client, Connection, Listener
+
+from .logger import logger
+from .model import Event
+
+if typing.TYPE_CHECKING:
+    from .core import Bot
+
+EVENT_FIELDS = tuple(field.name for field in dataclasses.fields(Event))
+
+proxy: typing.Optional["BotProxy"] = None
+
+
+def pack_event(event: Event) -> tuple:
+    return tuple(getattr(event, name) for name in EVENT_FIELDS)
+
+
+def unpack_event(values: tuple) -> Event:
+    return Event(**dict(zip(EVENT_FIELDS, values)))
+
+
+class BotProxy:
+    """子进程中的Bot代理, 接口调用通过连接转发给主进程的Bot执行"""
+
+    def __init__(self, conn: Connection):
+        self.conn = conn
+        self.methods: typing.Set[str] = set()
+
+    def request(self, *message) -> typing.Any:
+        self.conn.send(message)
+        status, value = self.conn.recv()
+        if status == "error":
+            raise value
+        return value
+
+    def __getattr__(self, name: str) -> typing.Any:
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        if name not in self.methods:
+            status, value = self.request("getattr", name)
+            if status != "callable":
+                return value
+            self.methods.add(name)
+
+        def method(*args, **kwargs):
+            return self.request("call", name, args, kwargs)
+
+        return method
+
+
+def init_worker(address: typing.Tuple[str, int], authkey: bytes) -> None:
+    global proxy
+    proxy = BotProxy(Client(address, authkey=authkey))
+
+
+def run_handler(func: typing.Callable[["Bot", Event], typing.Any], values: tuple) -> typing.Any:
+    return func(proxy, unpack_event(values))
+
+
+class ProcessHandlerPool:
+    """在进程池中执行CPU密集型消息处理函数
+
+    处理函数需定义在可被子进程导入的模块中(而非启动Bot的脚本), 以便以引用方式序列化。
+    """
+
+    def __init__(self, bot: "Bot", max_workers: typing.Optional[int] = None):
+        self.bot = bot
+        self.authkey = os.urandom(16)
+        self.listener = Listener(("127.0.0.1", 0), authkey=self.authkey)
+        threading.Thread(target=self.serve, daemon=True).start()
+        self.executor = ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=init_worker,
+            initargs=(self.listener.address, self.authkey)
+        )
+
+    def serve(self) -> None:
+        while True:
+            try:
+                conn = self.listener.accept()
+            except OSError:
+                break
+            threading.Thread(target=self.serve_connection, args=(conn,), daemon=True).start()
+
+    def serve_connection(self, conn: Connection) -> None:
+        with conn:
+            while True:
+                try:
+                    message = conn.recv()
+                except (EOFError, OSError):
+                    break
+
+                try:
+                    if message[0] == "getattr":
+                        value = getattr(self.bot, message[1])
+                        reply = ("ok", ("callable", None) if callable(value) else ("value", value))
+                    else:
+                        _, name, args, kwargs = message
+                        reply = ("ok", getattr(self.bot, name)(*args, **kwargs))
+                except Exception as e:
+                    reply = ("error", e)
+
+                try:
+                    conn.send(reply)
+                except Exception as e:
+                    conn.send(("error", RuntimeError(repr(e))))
+
+    def wrap(self, func: typing.Callable[["Bot", Event], typing.Any]) -> typing.Callable[["Bot", Event], None]:
+        def handler(bot: "Bot", event: Event) -> None:
+            self.executor.submit(run_handler, func, pack_event(event)).add_done_callback(self.done)
+
+        return handler
+
+    @staticmethod
+    def done(future: Future) -> None:
+        e = None if future.cancelled() else future.exception()
+        if e is not None:
+            logger.error("".join(traceback.format_exception(type(e), e, e.__traceback__)))
+
+    def shutdown(self, wait: bool = True) -> None:
+        self.executor.shutdown(wait=wait)
+        self.listener.close()